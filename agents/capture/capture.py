@@ -1,9 +1,14 @@
 import abc
+import logging
 
 from pacai.agents.base import BaseAgent
 from pacai.core import distanceCalculator
 from pacai.util import util
 
+# The default time (in seconds) to spend computing maze distances in registerInitialState().
+# Games allow 15 seconds for the whole startup.
+DEFAULT_STARTUP_TIME_FOR_COMPUTING = 10.0
+
 class CaptureAgent(BaseAgent):
     """
     A base class for capture agents.
@@ -13,7 +18,8 @@ class CaptureAgent(BaseAgent):
     and implement `CaptureAgent.chooseAction`.
     """
 
-    def __init__(self, index, timeForComputing = 0.1, **kwargs):
+    def __init__(self, index, timeForComputing = 0.1,
+            startupTimeForComputing = DEFAULT_STARTUP_TIME_FOR_COMPUTING, **kwargs):
         super().__init__(index, **kwargs)
 
         # Whether or not you're on the red team
@@ -31,16 +37,24 @@ class CaptureAgent(BaseAgent):
         # Time to spend each turn on computing maze distances
         self.timeForComputing = timeForComputing
 
+        # Time to spend on computing maze distances at the start of the game
+        self.startupTimeForComputing = startupTimeForComputing
+
     def registerInitialState(self, gameState):
         """
         This method handles the initial setup of the agent and populates useful fields,
         such as the team the agent is on and the `pacai.core.distanceCalculator.Distancer`.
+
+        Maze distances are computed for up to `startupTimeForComputing` seconds here,
+        and then for up to `timeForComputing` seconds before each move until they are done.
         """
 
         self.red = gameState.isOnRedTeam(self.index)
         self.distancer = distanceCalculator.Distancer(gameState.getInitialLayout())
 
-        self.distancer.getMazeDistances()
+        if (not self.distancer.computeMazeDistances(self.startupTimeForComputing)):
+            logging.debug('Agent %d computed %.1f%% of the maze distances during startup.' %
+                    (self.index, 100.0 * self.distancer.getProgress()))
 
     def final(self, gameState):
         self.observationHistory = []
@@ -64,6 +78,9 @@ class CaptureAgent(BaseAgent):
 
         self.observationHistory.append(gameState)
 
+        if (self.distancer is not None and not self.distancer.isReadyForMazeDistance()):
+            self.distancer.computeMazeDistances(self.timeForComputing)
+
         myState = gameState.getAgentState(self.index)
         myPos = myState.getPosition()
 
@@ -160,6 +177,15 @@ class CaptureAgent(BaseAgent):
 
         return self.distancer.getDistance(pos1, pos2)
 
+    def getNearest(self, source, targets):
+        """
+        Returns the closest target to the source and its distance (as a (target, distance) tuple)
+        using the builtin distancer, or None if there are no targets.
+        This is much faster than calling `CaptureAgent.getMazeDistance` for each target.
+        """
+
+        return self.distancer.nearest(source, targets)
+
     def getPreviousObservation(self):
         """
         Returns the `pacai.core.gamestate.AbstractGameState` object corresponding to
@@ -29,8 +29,8 @@ class DefensiveReflexAgent(ReflexCaptureAgent):
         features['numInvaders'] = len(invaders)
 
         if (len(invaders) > 0):
-            dists = [self.getMazeDistance(myPos, a.getPosition()) for a in invaders]
-            features['invaderDistance'] = min(dists)
+            _, minDistance = self.getNearest(myPos, [a.getPosition() for a in invaders])
+            features['invaderDistance'] = minDistance
 
         if (action == Directions.STOP):
             features['stop'] = 1
@@ -1,3 +1,5 @@
+import functools
+import json
 import logging
 import time
 from typing import Callable, Union
@@ -11,6 +13,10 @@ from pacai.core.search.problem import SearchProblem
 from pacai.student.search import depthFirstSearch
 from pacai.util import reflection
 
+# Where to look for search functions and heuristics that are not given by their qualified name.
+SEARCH_FUNCTION_MODULE = 'pacai.core.search.engine'
+HEURISTIC_MODULE = 'pacai.core.search.heuristic'
+
 class SearchAgent(BaseAgent):
     """
     A general search agent that finds a path using a supplied search algorithm for a
@@ -19,15 +25,36 @@ class SearchAgent(BaseAgent):
 
     As a default, this agent runs `pacai.student.search.depthFirstSearch` on a
     `pacai.core.search.position.PositionSearchProblem` to find location (1, 1).
+
+    Search functions and heuristics can be given by their fully qualified names,
+    or by their short names in `pacai.core.search.engine` and `pacai.core.search.heuristic`
+    (e.g. `--agent-args fn=astar,heuristic=manhattan`).
+
+    If searchStatsPath is given, the problem's `pacai.core.search.stats.SearchStats`
+    are written there as JSON after the search (see `--search-stats` in `pacai.bin.pacman`).
+    If visitRecording is given, it is set on the problem before the search
+    (see `pacai.core.search.problem.SearchProblem.setVisitRecording`).
+    If timeBudget (in seconds) is given, it is passed to search functions that take one
+    (e.g. `--agent-args fn=anytime,heuristic=manhattan,timeBudget=0.5`).
     """
 
     def __init__(self, index,
             fn: Union[str, Callable[[SearchProblem], any]] = depthFirstSearch,
             prob: Union[str, Callable[[AbstractGameState], SearchProblem]] = PositionSearchProblem,
             heuristic: Union[str, Callable] = nullHeuristic,
+            searchStatsPath: str = None,
+            visitRecording: str = None,
+            timeBudget: float = None,
             **kwargs):
         super().__init__(index, **kwargs)
 
+        self._searchStatsPath = searchStatsPath
+        self._visitRecording = visitRecording
+
+        self._timeBudget = timeBudget
+        if (timeBudget is not None):
+            self._timeBudget = float(timeBudget)
+
         if isinstance(prob, str):
             # Get the search problem type from the name.
             self.searchType = reflection.qualifiedImport(prob)
@@ -64,8 +91,12 @@ class SearchAgent(BaseAgent):
 
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem.
+        if (self._visitRecording is not None):
+            problem.setVisitRecording(self._visitRecording)
 
+        searchStartTime = time.perf_counter()
         self._actions = self.searchFunction(problem)  # Find a path.
+        searchTime = time.perf_counter() - searchStartTime
         self._actionIndex = 0
 
         totalCost = problem.actionsCost(self._actions)
@@ -77,6 +108,22 @@ class SearchAgent(BaseAgent):
 
         logging.info('Search nodes expanded: %d' % problem.getExpandedCount())
 
+        if (problem.getStats().suboptimalityBound is not None):
+            logging.info('Path cost is within %.2f times the optimal cost' %
+                    (problem.getStats().suboptimalityBound))
+
+        # Search functions that do not fill in the stats (like the student ones)
+        # still get the numbers the agent knows.
+        stats = problem.getStats()
+        if (stats.searchTime == 0.0):
+            stats.searchTime = searchTime
+
+        if (stats.expanded == 0):
+            stats.expanded = problem.getExpandedCount()
+
+        if (self._searchStatsPath is not None):
+            self._writeSearchStats(problem, totalCost)
+
     def getAction(self, state):
         """
         Returns the next action in the path chosen earlier (in registerInitialState).
@@ -96,21 +143,54 @@ class SearchAgent(BaseAgent):
         Get the specified search function by name.
         If that function also takes a heurisitc (i.e. has a parameter called "heuristic"),
         then return a lambda that binds the heuristic to the function.
+        The time budget is bound the same way (to a parameter called "timeBudget").
         """
 
         # Locate the function.
+        functionName = self._qualifyName(functionName, SEARCH_FUNCTION_MODULE)
         function = reflection.qualifiedImport(functionName)
 
+        takesHeuristic = ('heuristic' in function.__code__.co_varnames)
+
+        if (self._timeBudget is not None):
+            if ('timeBudget' in function.__code__.co_varnames):
+                function = functools.partial(function, timeBudget = self._timeBudget)
+            else:
+                logging.warning('[SearchAgent] search function %s does not take a time budget.' %
+                        (functionName))
+
         # Check if the function has a heuristic.
-        if 'heuristic' not in function.__code__.co_varnames:
+        if not takesHeuristic:
             logging.info('[SearchAgent] using function %s.' % (functionName))
             return function
 
         if isinstance(heuristic, str):
             # Fetch the heuristic.
+            heuristic = self._qualifyName(heuristic, HEURISTIC_MODULE)
             heuristic = reflection.qualifiedImport(heuristic)
         logging.info('[SearchAgent] using function %s and heuristic %s.' %
                 (functionName, heuristic))
 
         # Bind the heuristic.
         return lambda x: function(x, heuristic = heuristic)
+
+    def _qualifyName(self, name, moduleName):
+        """
+        Short (non-qualified) names are looked up in the given module.
+        """
+
+        if ('.' in name):
+            return name
+
+        return moduleName + '.' + name
+
+    def _writeSearchStats(self, problem, totalCost):
+        data = problem.getStats().toDict()
+        data['problem'] = type(problem).__name__
+        data['pathLength'] = len(self._actions)
+        data['pathCost'] = totalCost
+
+        with open(self._searchStatsPath, 'w') as file:
+            json.dump(data, file, indent = 4)
+
+        logging.info('Search stats written to: %s.' % (self._searchStatsPath))
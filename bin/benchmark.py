@@ -0,0 +1,172 @@
+"""
+Micro-benchmarks for the game state machinery.
+
+Measures how fast successors are generated on a capture layout,
+and how fast and how large agent states are compared to a plain (unslotted) agent state
+like the one `pacai.core.agentstate.AgentState` used to be.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from pacai.bin.capture import CaptureGameState
+from pacai.core.agentstate import AgentState
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+
+DEFAULT_LAYOUT = 'defaultCapture'
+DEFAULT_NUM_STATES = 200
+DEFAULT_SECONDS = 1.0
+DEFAULT_SEED = 4
+
+# The game length for the sampled states, long enough to never run out.
+GAME_LENGTH = 1200
+
+class _PlainAgentState(object):
+    """
+    An agent state that keeps its fields in a dict,
+    and copies itself through the constructor.
+    This is only a baseline for the benchmark.
+    """
+
+    def __init__(self, position, direction, isPacman):
+        self._startPosition = position
+        self._startDirection = direction
+        self._startIsPacman = isPacman
+
+        self._position = position
+        self._direction = direction
+        self._isPacman = isPacman
+        self._scaredTimer = 0
+        self._hash = None
+
+    def copy(self):
+        state = _PlainAgentState(self._startPosition, self._startDirection, self._startIsPacman)
+
+        state._position = self._position
+        state._direction = self._direction
+        state._isPacman = self._isPacman
+        state._scaredTimer = self._scaredTimer
+        state._hash = self._hash
+
+        return state
+
+def benchmarkAgentStates(seconds = DEFAULT_SECONDS):
+    """
+    Get the bytes and copy time (in microseconds) of slotted and plain agent states:
+    {name: (bytes, copy microseconds), ...}.
+    """
+
+    results = {}
+
+    for (name, agentClass) in [('slotted', AgentState), ('plain', _PlainAgentState)]:
+        agent = agentClass((1, 2), Directions.STOP, True)
+
+        size = sys.getsizeof(agent)
+        if (hasattr(agent, '__dict__')):
+            size += sys.getsizeof(agent.__dict__)
+
+        copies, elapsed = _timeCalls(agent.copy, seconds)
+        results[name] = (size, elapsed / copies * 1000000)
+
+    return results
+
+def benchmarkSuccessors(layoutName = DEFAULT_LAYOUT, numStates = DEFAULT_NUM_STATES,
+        seconds = DEFAULT_SECONDS, seed = DEFAULT_SEED):
+    """
+    Generate the successors for every legal action of every agent
+    on states sampled from a random game.
+    Returns the number of agents, and the successors generated per second.
+    """
+
+    states = _sampleStates(getLayout(layoutName), numStates, random.Random(seed))
+
+    def generateAll():
+        count = 0
+
+        for state in states:
+            for agentIndex in range(state.getNumAgents()):
+                count += len(state.generateSuccessors(agentIndex))
+
+        return count
+
+    numSuccessors = generateAll()
+    rounds, elapsed = _timeCalls(generateAll, seconds)
+
+    return states[0].getNumAgents(), (rounds * numSuccessors) / elapsed
+
+def main(argv):
+    """
+    Entry point for the benchmarks.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    """
+
+    parser = argparse.ArgumentParser(description = __doc__, prog = os.path.basename(__file__))
+
+    parser.add_argument('-l', '--layout', dest = 'layout',
+            action = 'store', type = str, default = DEFAULT_LAYOUT,
+            help = 'use the specified capture layout (default: %(default)s)')
+
+    parser.add_argument('--num-states', dest = 'numStates',
+            action = 'store', type = int, default = DEFAULT_NUM_STATES,
+            help = 'the number of states to generate successors for (default: %(default)s)')
+
+    parser.add_argument('--seconds', dest = 'seconds',
+            action = 'store', type = float, default = DEFAULT_SECONDS,
+            help = 'about how long to run each measurement (default: %(default)s)')
+
+    parser.add_argument('-s', '--seed', dest = 'seed',
+            action = 'store', type = int, default = DEFAULT_SEED,
+            help = 'the seed for the game the states are sampled from (default: %(default)s)')
+
+    options = parser.parse_args(argv)
+
+    numAgents, successorsPerSecond = benchmarkSuccessors(options.layout, options.numStates,
+            options.seconds, options.seed)
+    print('Successor generation (%s, %d agents): %.0f successors/s' %
+            (options.layout, numAgents, successorsPerSecond))
+
+    for (name, (size, copyTime)) in benchmarkAgentStates(options.seconds).items():
+        print('%s AgentState: %d bytes (%d bytes per state), copy: %.2f us' %
+                (name.capitalize(), size, size * numAgents, copyTime))
+
+def _sampleStates(layout, numStates, rng):
+    """
+    Play random moves from the start of a capture game and keep every state.
+    """
+
+    state = CaptureGameState(layout, GAME_LENGTH)
+    states = [state]
+
+    agentIndex = 0
+    while (len(states) < numStates and not state.isOver()):
+        action = rng.choice(state.getLegalActions(agentIndex))
+        state = state.generateSuccessor(agentIndex, action)
+        states.append(state)
+
+        agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    return states
+
+def _timeCalls(function, seconds):
+    """
+    Call the function until about the given number of seconds have passed.
+    Returns the number of calls and the seconds they took.
+    """
+
+    calls = 0
+    startTime = time.perf_counter()
+
+    while (True):
+        function()
+        calls += 1
+
+        elapsed = time.perf_counter() - startTime
+        if (elapsed >= seconds):
+            return calls, elapsed
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -9,6 +9,7 @@ import logging
 import os
 import pickle
 import random
+import struct
 import sys
 
 from pacai.agents import keyboard
@@ -18,7 +19,6 @@ from pacai.core.actions import Actions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
-from pacai.core.grid import Grid
 from pacai.core.layout import Layout
 from pacai.core.layout import getLayout
 from pacai.ui.capture.null import CaptureNullView
@@ -38,6 +38,9 @@ MIN_FOOD = 2
 
 SCARED_TIME = 40
 
+# How the time left is stored by `CaptureGameState.toBytes`.
+TIMELEFT_BYTES = struct.Struct('<i')
+
 class CaptureGameState(AbstractGameState):
     """
     A game state specific to capture.
@@ -67,40 +70,7 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueTeam.append(agentIndex)
 
-        # Build some denormalized structures for fast access.
-
-        self._redCapsules = []
-        self._blueCapsules = []
-
-        for capsule in self.getCapsules():
-            if (self.isOnRedSide(capsule)):
-                self._redCapsules.append(capsule)
-            else:
-                self._blueCapsules.append(capsule)
-
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
-
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
-
-    # Override
-    def generateSuccessor(self, agentIndex, action):
-        # Check that successors exist.
-        if (self.isOver()):
-            raise RuntimeError("Can't generate successors of a terminal state.")
-
-        successor = self._initSuccessor()
-        successor._applySuccessorAction(agentIndex, action)
-
-        return successor
+        self._buildSides()
 
     # Override
     def getLegalActions(self, agentIndex = 0):
@@ -128,12 +98,17 @@ class CaptureGameState(AbstractGameState):
             self._redFood = self._redFood.copy()
             self._blueFood = self._blueFood.copy()
 
-        super().eatFood(x, y)
+        if (not super().eatFood(x, y)):
+            return False
 
         if (self.isOnRedSide((x, y))):
             self._redFood[x][y] = False
+            self._numRedFood -= 1
         else:
             self._blueFood[x][y] = False
+            self._numBlueFood -= 1
+
+        return True
 
     def getBlueCapsules(self):
         """
@@ -161,6 +136,20 @@ class CaptureGameState(AbstractGameState):
 
         return self._blueTeam
 
+    def getNumBlueFood(self):
+        """
+        Get the amount of food left on the blue side.
+        """
+
+        return self._numBlueFood
+
+    def getNumRedFood(self):
+        """
+        Get the amount of food left on the red side.
+        """
+
+        return self._numRedFood
+
     def getRedCapsules(self):
         """
         Get a list of remaining capsules on the red side.
@@ -224,13 +213,14 @@ class CaptureGameState(AbstractGameState):
 
         return self._teams[agentIndex]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    # Override
+    def _applySuccessorAction(self, agentIndex, action, checkLegal = True):
         """
         Apply the action to the context state (self).
         """
 
         # Find appropriate rules for the agent.
-        AgentRules.applyAction(self, action, agentIndex)
+        AgentRules.applyAction(self, action, agentIndex, checkLegal)
         AgentRules.checkDeath(self, agentIndex)
         AgentRules.decrementTimer(self.getAgentState(agentIndex))
 
@@ -240,6 +230,67 @@ class CaptureGameState(AbstractGameState):
 
         self._hash = None
 
+    def _buildSides(self):
+        """
+        Build some denormalized structures for fast access to the food and capsules on each side.
+        """
+
+        self._redCapsules = []
+        self._blueCapsules = []
+
+        for capsule in self.getCapsules():
+            if (self.isOnRedSide(capsule)):
+                self._redCapsules.append(capsule)
+            else:
+                self._blueCapsules.append(capsule)
+
+        # Red is on the left side (see isOnRedSide()), and columns are contiguous in a BitGrid.
+        width = self._food.getWidth()
+        middle = int(width / 2)
+
+        self._redFood = self._food.keepColumns(0, middle)
+        self._blueFood = self._food.keepColumns(middle, width)
+
+        # Running counts of the food on each side.
+        self._numRedFood = self._redFood.count()
+        self._numBlueFood = self._blueFood.count()
+
+    # Override
+    def _getExtraBytes(self):
+        return TIMELEFT_BYTES.pack(self._timeleft)
+
+    # Override
+    def _getSuccessorCacheKey(self, agentIndex, action):
+        return super()._getSuccessorCacheKey(agentIndex, action) + (self._timeleft, )
+
+    # Override
+    def _getUndoRecord(self):
+        return (super()._getUndoRecord(), self._redFood, self._blueFood,
+                self._numRedFood, self._numBlueFood,
+                self._redCapsules, self._blueCapsules, self._timeleft)
+
+    # Override
+    @classmethod
+    def _newFromBytes(cls, layout, extraData):
+        if (len(extraData) != TIMELEFT_BYTES.size):
+            raise ValueError('Expected %d extra bytes for a capture state, found %d.' %
+                    (TIMELEFT_BYTES.size, len(extraData)))
+
+        return cls(layout, TIMELEFT_BYTES.unpack(extraData)[0])
+
+    # Override
+    def _restoreUndoRecord(self, record):
+        (baseRecord, self._redFood, self._blueFood,
+                self._numRedFood, self._numBlueFood,
+                self._redCapsules, self._blueCapsules, self._timeleft) = record
+
+        super()._restoreUndoRecord(baseRecord)
+
+    # Override
+    def _setBoard(self, food, capsules):
+        super()._setBoard(food, capsules)
+        self._buildSides()
+
 class CaptureRules:
     """
     These game rules manage the control flow of a game, deciding when
@@ -255,8 +306,8 @@ class CaptureRules:
         game.state = initState
         game.length = length
 
-        self._totalBlueFood = initState.getBlueFood().count()
-        self._totalRedFood = initState.getRedFood().count()
+        self._totalBlueFood = initState.getNumBlueFood()
+        self._totalRedFood = initState.getNumRedFood()
 
         return game
 
@@ -279,10 +330,10 @@ class CaptureRules:
         redWin = False
         blueWin = False
 
-        if (state.getRedFood().count() <= MIN_FOOD):
+        if (state.getNumRedFood() <= MIN_FOOD):
             logging.info("The Blue team ate all but %d of the opponents' dots." % MIN_FOOD)
             blueWin = True
-        elif (state.getBlueFood().count() <= MIN_FOOD):
+        elif (state.getNumBlueFood() <= MIN_FOOD):
             logging.info("The Red team ate all but %d of the opponents' dots." % MIN_FOOD)
             redWin = True
         else:
@@ -342,17 +393,16 @@ class AgentRules:
         """
 
         agentState = state.getAgentState(agentIndex)
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return list(state.getInitialLayout().getPossibleActions(agentState.getPosition(),
+                agentState.getDirection()))
 
     @staticmethod
-    def applyAction(state, action, agentIndex):
+    def applyAction(state, action, agentIndex, checkLegal = True):
         """
         Edits the state to reflect the results of the action.
         """
 
-        legal = AgentRules.getLegalActions(state, agentIndex)
-        if (action not in legal):
+        if (checkLegal and action not in AgentRules.getLegalActions(state, agentIndex)):
             raise ValueError('Illegal action: ' + str(action))
 
         agentState = state.getAgentState(agentIndex)
@@ -392,8 +442,8 @@ class AgentRules:
             else:
                 state.addScore(-FOOD_POINTS)
 
-            if ((isRed and state.getBlueFood().count() <= MIN_FOOD)
-                    or (not isRed and state.getRedFood().count() <= MIN_FOOD)):
+            if ((isRed and state.getNumBlueFood() <= MIN_FOOD)
+                    or (not isRed and state.getNumRedFood() <= MIN_FOOD)):
                 state.endGame(True)
 
             return
@@ -23,6 +23,9 @@ from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
 from pacai.core.layout import getLayout
+from pacai.core.search.problem import RECORD_VISITS_FULL
+from pacai.core.search.problem import RECORD_VISITS_OFF
+from pacai.core.search.problem import VISIT_RECORDING_MODES
 from pacai.ui.pacman.null import PacmanNullView
 from pacai.ui.pacman.text import PacmanTextView
 from pacai.util.logs import initLogging
@@ -31,6 +34,9 @@ from pacai.util.util import nearestPoint
 
 PACMAN_AGENT_INDEX = 0
 
+# Pick the visit recording of search agents from the display.
+VISIT_RECORDING_AUTO = 'auto'
+
 SCARED_TIME = 40  # The number of moves that ghosts are scared for.
 COLLISION_TOLERANCE = 0.7  # How close ghosts must be to Pacman to kill.
 
@@ -49,21 +55,6 @@ class PacmanGameState(AbstractGameState):
     def __init__(self, layout):
         super().__init__(layout)
 
-    # Override
-    def generateSuccessor(self, agentIndex, action):
-        """
-        Returns the successor state after the specified agent takes the action.
-        """
-
-        # Check that successors exist.
-        if (self.isOver()):
-            raise RuntimeError("Can't generate successors of a terminal state.")
-
-        successor = self._initSuccessor()
-        successor._applySuccessorAction(agentIndex, action)
-
-        return successor
-
     # Override
     def getLegalActions(self, agentIndex = PACMAN_AGENT_INDEX):
         if (self.isOver()):
@@ -118,16 +109,17 @@ class PacmanGameState(AbstractGameState):
 
         return self._agentStates[PACMAN_AGENT_INDEX]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    # Override
+    def _applySuccessorAction(self, agentIndex, action, checkLegal = True):
         """
         Apply the action to the context state (self).
         """
 
         # Let the agent's logic deal with its action's effects on the board.
         if (agentIndex == PACMAN_AGENT_INDEX):
-            PacmanRules.applyAction(self, action)
+            PacmanRules.applyAction(self, action, checkLegal)
         else:
-            GhostRules.applyAction(self, action, agentIndex)
+            GhostRules.applyAction(self, action, agentIndex, checkLegal)
 
         # Time passes.
         if (agentIndex == PACMAN_AGENT_INDEX):
@@ -217,17 +209,16 @@ class PacmanRules:
         """
 
         agentState = state.getPacmanState()
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return list(state.getInitialLayout().getPossibleActions(agentState.getPosition(),
+                agentState.getDirection()))
 
     @staticmethod
-    def applyAction(state, action):
+    def applyAction(state, action, checkLegal = True):
         """
         Edits the state to reflect the results of the action.
         """
 
-        legal = PacmanRules.getLegalActions(state)
-        if (action not in legal):
+        if (checkLegal and action not in PacmanRules.getLegalActions(state)):
             raise ValueError('Illegal pacman action: ' + str(action))
 
         pacmanState = state.getPacmanState()
@@ -278,22 +269,23 @@ class GhostRules:
         """
 
         agentState = state.getGhostState(ghostIndex)
-        possibleActions = Actions.getPossibleActions(agentState.getPosition(),
-                agentState.getDirection(), state.getWalls())
-        reverse = Actions.reverseDirection(agentState.getDirection())
+        direction = agentState.getDirection()
+        possibleActions = state.getInitialLayout().getPossibleActions(agentState.getPosition(),
+                direction)
+        reverse = Actions.reverseDirection(direction)
 
-        if (Directions.STOP in possibleActions):
-            possibleActions.remove(Directions.STOP)
+        legalActions = [action for action in possibleActions
+                if (action != Directions.STOP and action != reverse)]
 
-        if (reverse in possibleActions and len(possibleActions) > 1):
-            possibleActions.remove(reverse)
+        # Turning around is only allowed at dead ends.
+        if (len(legalActions) == 0 and reverse != Directions.STOP and reverse in possibleActions):
+            legalActions.append(reverse)
 
-        return possibleActions
+        return legalActions
 
     @staticmethod
-    def applyAction(state, action, ghostIndex):
-        legal = GhostRules.getLegalActions(state, ghostIndex)
-        if (action not in legal):
+    def applyAction(state, action, ghostIndex, checkLegal = True):
+        if (checkLegal and action not in GhostRules.getLegalActions(state, ghostIndex)):
             raise ValueError('Illegal ghost action: ' + str(action))
 
         ghostState = state.getGhostState(ghostIndex)
@@ -410,6 +402,18 @@ def readCommand(argv):
             help = 'comma separated arguments to be passed to agents (e.g. \'opt1=val1,opt2\')'
                 + '(default: %(default)s)')
 
+    parser.add_argument('--search-stats', dest = 'searchStats',
+            action = 'store', type = str, default = None,
+            help = 'write the search stats of search agents to this file as JSON '
+                + '(default: %(default)s)')
+
+    parser.add_argument('--visit-recording', dest = 'visitRecording',
+            action = 'store', type = str, default = VISIT_RECORDING_AUTO,
+            help = 'how much of their visited locations search agents record for highlighting, '
+                + '\'auto\' only records them if the display draws highlights '
+                + '(default: %(default)s)',
+            choices = [VISIT_RECORDING_AUTO] + VISIT_RECORDING_MODES)
+
     parser.add_argument('--timeout', dest = 'timeout',
             action = 'store', type = int, default = 30,
             help = 'maximum time limit (seconds) an agent can spend computing per game '
@@ -453,6 +457,9 @@ def readCommand(argv):
         if 'numTraining' not in agentOpts:
             agentOpts['numTraining'] = options.numTraining
 
+    if (options.searchStats is not None):
+        agentOpts['searchStatsPath'] = options.searchStats
+
     # Don't display training games.
     if 'numTrain' in agentOpts:
         options.numQuiet = int(agentOpts['numTrain'])
@@ -478,6 +485,16 @@ def readCommand(argv):
         args['display'] = PacmanGUIView(fps = options.fps, title = 'Pacman', **viewOptions)
         agentOpts['keyboard'] = args['display'].getKeyboard()
 
+    # Only keep the search highlights if something will draw them.
+    if 'visitRecording' not in agentOpts:
+        visitRecording = options.visitRecording
+        if (visitRecording == VISIT_RECORDING_AUTO):
+            visitRecording = RECORD_VISITS_OFF
+            if (args['display'].drawsHighlights()):
+                visitRecording = RECORD_VISITS_FULL
+
+        agentOpts['visitRecording'] = visitRecording
+
     args['catchExceptions'] = options.catchExceptions
     args['gameToReplay'] = options.replay
     args['ghosts'] = [BaseAgent.loadAgent(options.ghost, i + 1) for i in range(options.numGhosts)]
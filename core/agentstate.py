@@ -9,13 +9,16 @@ class AgentState:
     The convention for positions, like a graph, is that (0, 0) is the lower left corner,
     x increases horizontally and y increases vertically.
     Therefore, north is the direction of increasing y, or (0, 1).
+
+    Agent states are copied for every agent on every successor,
+    so they are kept compact (slotted, with the starting information in one shared tuple).
     """
 
+    __slots__ = ('_start', '_position', '_direction', '_isPacman', '_scaredTimer', '_hash')
+
     def __init__(self, position, direction, isPacman):
-        # Save the starting information for later use.
-        self._startPosition = position
-        self._startDirection = direction
-        self._startIsPacman = isPacman
+        # Save the starting information (position, direction, isPacman) for later use.
+        self._start = (position, direction, isPacman)
 
         self._position = position
         self._direction = direction
@@ -23,18 +26,25 @@ class AgentState:
         self._isPacman = isPacman
         self._scaredTimer = 0
 
+        # The hash is cached, any modification should clear it.
+        self._hash = None
+
     def copy(self):
-        state = AgentState(self._startPosition, self._startDirection, self._startIsPacman)
+        # Skip the constructor, every field is about to be set.
+        state = AgentState.__new__(AgentState)
 
+        state._start = self._start
         state._isPacman = self._isPacman
         state._position = self._position
         state._direction = self._direction
         state._scaredTimer = self._scaredTimer
+        state._hash = self._hash
 
         return state
 
     def decrementScaredTimer(self):
         self._scaredTimer = max(0, self._scaredTimer - 1)
+        self._hash = None
 
     def getDirection(self):
         return self._direction
@@ -69,9 +79,11 @@ class AgentState:
 
     def setIsPacman(self, isPacman):
         self._isPacman = isPacman
+        self._hash = None
 
     def setScaredTimer(self, timer):
         self._scaredTimer = timer
+        self._hash = None
 
     def snapToNearestPoint(self):
         """
@@ -79,16 +91,31 @@ class AgentState:
         """
 
         self._position = util.nearestPoint(self._position)
+        self._hash = None
+
+    def restore(self, snapshot):
+        """
+        Restore this agent to the point where `AgentState.snapshot` was called.
+        """
+
+        (self._position, self._direction, self._isPacman, self._scaredTimer,
+                self._hash) = snapshot
 
     def respawn(self):
         """
         This agent was killed, respawn it at the start as a pacman.
         """
 
-        self._position = self._startPosition
-        self._direction = self._startDirection
-        self._isPacman = self._startIsPacman
+        self._position, self._direction, self._isPacman = self._start
         self._scaredTimer = 0
+        self._hash = None
+
+    def snapshot(self):
+        """
+        Get all the parts of this agent that can change during a game.
+        """
+
+        return (self._position, self._direction, self._isPacman, self._scaredTimer, self._hash)
 
     def updatePosition(self, vector):
         """
@@ -99,6 +126,7 @@ class AgentState:
         dx, dy = vector
 
         self._position = (x + dx, y + dy)
+        self._hash = None
 
         direction = Actions.vectorToDirection(vector)
         if (direction != Directions.STOP):
@@ -115,7 +143,11 @@ class AgentState:
                 and self._scaredTimer == other._scaredTimer)
 
     def __hash__(self):
-        return util.buildHash(self._position, self._direction, self._isPacman, self._scaredTimer)
+        if (self._hash is None):
+            self._hash = util.buildHash(self._position, self._direction, self._isPacman,
+                    self._scaredTimer)
+
+        return self._hash
 
     def __str__(self):
         typeString = 'Ghost'
@@ -127,4 +159,4 @@ class AgentState:
             scaredString = '!'
 
         return "%s%s: Position: %s, Direction: %s" % (typeString, scaredString,
-                str(self._position), str(self.direction))
+                str(self._position), str(self._direction))
@@ -1,5 +1,142 @@
-from pacai.core.search.position import PositionSearchProblem
-from pacai.student import search
+import array
+import weakref
+
+from pacai.util.lru import LRUCache
+
+# About how much memory (in bytes) the cached BFS rows of a single wall grid may use.
+DEFAULT_MAZE_CACHE_BYTES = 8 * 1024 * 1024
+
+# How `bfs` marks cells that can not be reached.
+BFS_UNREACHABLE = -1
+
+# {id(walls): (weakref(walls), MazeOracle), ...}
+# Entries go away with their walls.
+_mazeOracles = {}
+
+class MazeOracle(object):
+    """
+    Answers maze distance queries on a single wall grid.
+
+    The distances from a position to every open cell (a BFS row) are computed
+    the first time that position is queried.
+    Rows are kept in an LRU cache that is bounded by an estimate of their memory,
+    and a query is answered by the row of either position.
+    """
+
+    def __init__(self, walls, maxBytes = DEFAULT_MAZE_CACHE_BYTES):
+        _, self._indexes, self._adjacency = buildCells(walls)
+
+        self._rows = LRUCache(maxBytes, sizeFunction = lambda index, row: row.itemsize * len(row))
+
+    def getCacheStats(self):
+        """
+        Get the counters of the row cache, see `pacai.util.lru.LRUCache.getStats`.
+        """
+
+        return self._rows.getStats()
+
+    def getDistance(self, position1, position2):
+        """
+        Get the maze distance between two open positions,
+        or None if they can not reach each other.
+        Raises a KeyError if either position is not an open cell.
+        """
+
+        index1 = self._indexes[position1]
+        index2 = self._indexes[position2]
+
+        row = self._rows.get(index1)
+        if (row is not None):
+            distance = row[index2]
+        else:
+            row = self._rows.get(index2)
+            if (row is not None):
+                distance = row[index1]
+            else:
+                row = self._bfs(index1)
+                self._rows.put(index1, row)
+                distance = row[index2]
+
+        if (distance == BFS_UNREACHABLE):
+            return None
+
+        return distance
+
+    def getDistancesFrom(self, position):
+        """
+        Get the maze distance from an open position to every open cell,
+        as an array indexed by `MazeOracle.getIndex`.
+        Cells that can not be reached are -1.
+        Raises a KeyError if the position is not an open cell.
+        """
+
+        index = self._indexes[position]
+
+        row = self._rows.get(index)
+        if (row is None):
+            row = self._bfs(index)
+            self._rows.put(index, row)
+
+        return row
+
+    def getIndex(self, position):
+        """
+        Get the index of an open position in the arrays from `MazeOracle.getDistancesFrom`,
+        or None if the position is not an open cell.
+        """
+
+        return self._indexes.get(position)
+
+    def _bfs(self, source):
+        return array.array('i', bfs(self._adjacency, source))
+
+def bfs(adjacency, source):
+    """
+    Get the distance (in steps) from the source to every cell of a graph
+    from `buildCells`, as a list.
+    Cells that can not be reached are `BFS_UNREACHABLE`.
+    """
+
+    distances = [BFS_UNREACHABLE] * len(adjacency)
+    distances[source] = 0
+
+    frontier = [source]
+    distance = 0
+
+    while (len(frontier) > 0):
+        distance += 1
+        nextFrontier = []
+
+        for node in frontier:
+            for neighbor in adjacency[node]:
+                if (distances[neighbor] == BFS_UNREACHABLE):
+                    distances[neighbor] = distance
+                    nextFrontier.append(neighbor)
+
+        frontier = nextFrontier
+
+    return distances
+
+def buildCells(walls):
+    """
+    Give every open cell an id (its index in `walls.asList(False)`).
+    Returns the positions ([position, ...]), the ids ({position: id, ...}),
+    and the ids of the open neighbors of every cell ([[id, ...], ...]).
+    """
+
+    positions = walls.asList(False)
+    indexes = {position: index for (index, position) in enumerate(positions)}
+
+    adjacency = []
+    for (x, y) in positions:
+        neighbors = []
+        for neighbor in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]:
+            if (neighbor in indexes):
+                neighbors.append(indexes[neighbor])
+
+        adjacency.append(neighbors)
+
+    return positions, indexes, adjacency
 
 def manhattan(position1, position2):
     """
@@ -15,12 +152,35 @@ def euclidean(position1, position2):
 
     return ((position1[0] - position2[0]) ** 2 + (position1[1] - position2[1]) ** 2) ** 0.5
 
+def getMazeOracle(walls):
+    """
+    Get the shared `MazeOracle` for a wall grid.
+    The oracle lives as long as the walls do.
+    """
+
+    key = id(walls)
+
+    entry = _mazeOracles.get(key)
+    if (entry is not None and entry[0]() is walls):
+        return entry[1]
+
+    def forget(ref):
+        # The id may already belong to newer walls.
+        if (_mazeOracles.get(key, (None,))[0] is ref):
+            del _mazeOracles[key]
+
+    oracle = MazeOracle(walls)
+    _mazeOracles[key] = (weakref.ref(walls, forget), oracle)
+
+    return oracle
+
 def maze(position1, position2, gameState):
     """
-    Returns the maze distance between any two positions,
-    using the search functions you have already built.
+    Returns the maze distance between any two positions.
+    Positions that can not reach each other are 0 apart.
 
-    WARNING: `pacai.student.search.breadthFirstSearch` must already be implemted.
+    Distances come from a `MazeOracle` that is shared by every state on the same walls,
+    so repeated queries are cheap.
 
     Example usage: `distance.maze((2, 4), (5, 6), gameState)`.
     """
@@ -36,6 +196,8 @@ def maze(position1, position2, gameState):
     if (walls[x2][y2]):
         raise ValueError('Position2 is a wall: ' + str(position2))
 
-    prob = PositionSearchProblem(gameState, start = position1, goal = position2)
+    distance = getMazeOracle(walls).getDistance(position1, position2)
+    if (distance is None):
+        return 0
 
-    return len(search.breadthFirstSearch(prob))
+    return distance
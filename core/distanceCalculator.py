@@ -1,10 +1,38 @@
+import array
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import struct
 import sys
+import tempfile
+import time
 
+from pacai.core.distance import BFS_UNREACHABLE
+from pacai.core.distance import bfs
+from pacai.core.distance import buildCells
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
+from pacai.core.grid import BitGrid
+from pacai.util.lru import LRUCache
+
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing import shared_memory
+except ImportError:
+    # Shared memory needs Python 3.8+.
+    resource_tracker = None
+    shared_memory = None
+
+# Python 3.13+ can open shared memory without registering it with the resource tracker.
+_SHARED_MEMORY_HAS_TRACK = (sys.version_info >= (3, 13))
 
 DEFAULT_DISTANCE = 10000
 
+# Boards with more open cells than this use `LandmarkDistances` instead of a full table,
+# since the table grows with the square of the number of cells.
+DEFAULT_LANDMARK_THRESHOLD = 5000
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
@@ -14,13 +42,32 @@ class Distancer(object):
     distancer = Distancer(gameState.getInitialLayout())
     distancer.getDistance((1, 1), (10, 10))
     ```
+
+    Boards with more than landmarkThreshold open cells use a `LandmarkDistances`
+    instead of a full `MazeDistances` table.
     """
 
-    def __init__(self, layout):
+    def __init__(self, layout, landmarkThreshold = DEFAULT_LANDMARK_THRESHOLD):
         self._distances = None
-        self.dc = DistanceCalculator(layout, self)
+        self.dc = DistanceCalculator(layout, self, landmarkThreshold)
+
+    def computeMazeDistances(self, timeBudget):
+        """
+        Compute maze distances for about timeBudget seconds,
+        and pick up where the last call left off.
+        Until all the distances are computed, pairs that are not computed yet
+        fall back to Manhattan distance.
+        Returns True when all the distances are ready.
+        """
+
+        self.dc.run(timeBudget)
+        return self.isReadyForMazeDistance()
 
     def getMazeDistances(self):
+        """
+        Compute all the maze distances now.
+        """
+
         self.dc.run()
 
     def getDistance(self, pos1, pos2):
@@ -28,11 +75,135 @@ class Distancer(object):
         The only function you will need after you create the object.
         """
 
+        return self._getDistance(pos1, pos2, self.getDistanceOnGrid)
+
+    def getDistances(self, source, targets):
+        """
+        Get the distance from the source to every target, in the same order as the targets.
+        This gives the same answers as `Distancer.getDistance` for each target,
+        but the source is only snapped to the grid and looked up once,
+        and all the targets are answered from the source's row in one pass
+        (or one search on boards that use landmarks).
+        """
+
+        if (self._distances is None):
+            return [manhattan(source, target) for target in targets]
+
+        # The common case: everything is on the grid and the source's row is ready.
+        if (isInt(source)):
+            getIndex = self._distances.getIndex
+            sourceIndex = getIndex(source)
+            targetIndexes = [getIndex(target) for target in targets]
+
+            if (sourceIndex is not None and None not in targetIndexes):
+                distances = self._distances.getDistancesByIndex(sourceIndex, targetIndexes)
+                if (None not in distances):
+                    return distances
+
+        sourceSnaps = self._getSnaps(source)
+        targetSnaps = [self._getSnaps(target) for target in targets]
+
+        targetIndexes = list({index for snaps in targetSnaps for (index, _) in snaps})
+
+        # {(source id, target id): distance, ...}
+        gridDistances = {}
+        for (sourceIndex, _) in sourceSnaps:
+            distances = self._distances.getDistancesByIndex(sourceIndex, targetIndexes)
+            for targetIndex, distance in zip(targetIndexes, distances):
+                if (distance is None):
+                    # Neither row has been computed yet.
+                    distance = manhattan(self._distances.getPosition(sourceIndex),
+                            self._distances.getPosition(targetIndex))
+
+                gridDistances[(sourceIndex, targetIndex)] = distance
+
+        sourceIsInt = isInt(source)
+
+        results = []
+        for target, snaps in zip(targets, targetSnaps):
+            if (sourceIsInt and isInt(target)):
+                results.append(gridDistances[(sourceSnaps[0][0], snaps[0][0])])
+                continue
+
+            bestDistance = DEFAULT_DISTANCE
+            for sourceIndex, sourceSnapDistance in sourceSnaps:
+                for targetIndex, targetSnapDistance in snaps:
+                    distance = (gridDistances[(sourceIndex, targetIndex)]
+                            + sourceSnapDistance + targetSnapDistance)
+                    if bestDistance > distance:
+                        bestDistance = distance
+
+            results.append(bestDistance)
+
+        return results
+
+    def getDistanceOnGrid(self, pos1, pos2):
+        index1, index2 = self._getIndexes(pos1, pos2)
+
+        distance = self._distances.getDistanceByIndex(index1, index2)
+        if distance is None:
+            # Neither row has been computed yet.
+            return manhattan(pos1, pos2)
+
+        return distance
+
+    def getLowerBound(self, pos1, pos2):
+        """
+        Get a lower bound on the maze distance.
+        For boards with a full table, this is just the distance.
+        For boards that use landmarks, this is much cheaper than the exact distance.
+        """
+
+        return self._getDistance(pos1, pos2, self.getLowerBoundOnGrid)
+
+    def getLowerBoundOnGrid(self, pos1, pos2):
+        index1, index2 = self._getIndexes(pos1, pos2)
+
+        distance = self._distances.getLowerBoundByIndex(index1, index2)
+        if distance is None:
+            return manhattan(pos1, pos2)
+
+        return distance
+
+    def getProgress(self):
+        """
+        Get the fraction (in [0, 1]) of the maze distances that have been computed.
+        """
+
+        if (self._distances is None):
+            return 0.0
+
+        return self._distances.getProgress()
+
+    def isReadyForMazeDistance(self):
+        return (self._distances is not None and self._distances.isComplete())
+
+    def nearest(self, source, targets):
+        """
+        Get the closest target to the source (the first one on ties) and its distance,
+        as a (target, distance) tuple.
+        Returns None if there are no targets.
+        """
+
+        targets = list(targets)
+        if (len(targets) == 0):
+            return None
+
+        distances = self.getDistances(source, targets)
+
+        bestIndex = 0
+        for index in range(1, len(distances)):
+            if (distances[index] < distances[bestIndex]):
+                bestIndex = index
+
+        return targets[bestIndex], distances[bestIndex]
+
+    def _getDistance(self, pos1, pos2, gridDistanceFunction):
         if (self._distances is None):
             return manhattan(pos1, pos2)
 
         if isInt(pos1) and isInt(pos2):
-            return self.getDistanceOnGrid(pos1, pos2)
+            return gridDistanceFunction(pos1, pos2)
 
         pos1Grids = getGrids2D(pos1)
         pos2Grids = getGrids2D(pos2)
@@ -40,22 +211,40 @@ class Distancer(object):
 
         for pos1Snap, snap1Distance in pos1Grids:
             for pos2Snap, snap2Distance in pos2Grids:
-                gridDistance = self.getDistanceOnGrid(pos1Snap, pos2Snap)
+                gridDistance = gridDistanceFunction(pos1Snap, pos2Snap)
                 distance = gridDistance + snap1Distance + snap2Distance
                 if bestDistance > distance:
                     bestDistance = distance
 
         return bestDistance
 
-    def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+    def _getSnaps(self, position):
+        """
+        Get the ids of the grid points a position snaps to, and how far away they are.
+        """
 
-        raise Exception("Position not in grid: " + str(key))
+        if (isInt(position)):
+            snaps = [(position, 0)]
+        else:
+            snaps = getGrids2D(position)
 
-    def isReadyForMazeDistance(self):
-        return (self._distances is not None)
+        results = []
+        for snap, snapDistance in snaps:
+            index = self._distances.getIndex(snap)
+            if (index is None):
+                raise Exception("Position not in grid: " + str(snap))
+
+            results.append((index, snapDistance))
+
+        return results
+
+    def _getIndexes(self, pos1, pos2):
+        index1 = self._distances.getIndex(pos1)
+        index2 = self._distances.getIndex(pos2)
+        if index1 is None or index2 is None:
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
+
+        return index1, index2
 
 def isInt(pos):
     x, y = pos
@@ -78,79 +267,865 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
+# The distance between open cells that can not reach each other.
+UNREACHABLE_DISTANCE = sys.maxsize
+
+# How unreachable pairs are stored in the distance matrix.
+_UNREACHABLE = BFS_UNREACHABLE
+
+# If this environment variable names a directory, distances are saved there,
+# so they can be shared across processes and runs.
+# The disk cache is off when the variable is unset or empty.
+CACHE_DIR_ENV = 'PACAI_CACHE_DIR'
+
+# The version of the files written by `MazeDistances.save`.
+CACHE_FILE_VERSION = 1
+
+# Magic, version, byte order (0 for little, 1 for big), array typecode, padding, number of cells.
+# The header is 16 bytes, so the matrix after it stays aligned.
+_CACHE_FILE_HEADER = struct.Struct('<4sBBc5xI')
+_CACHE_FILE_MAGIC = b'PACD'
+
+# About how much memory (in bytes) the distance tables of recently used wall grids may use.
+DEFAULT_DISTANCES_CACHE_BYTES = 256 * 1024 * 1024
+
+# How many landmark tables (which grow linearly with the number of cells) are kept.
+DEFAULT_LANDMARK_CACHE_SIZE = 16
+
+# Distances for the wall grids this process used recently.
+# {walls key: MazeDistances, ...}
+_mazeDistancesCache = LRUCache(DEFAULT_DISTANCES_CACHE_BYTES,
+        sizeFunction = lambda key, distances: distances.getNumBytes())
+
+# {walls key: LandmarkDistances, ...}
+_landmarkDistancesCache = LRUCache(DEFAULT_LANDMARK_CACHE_SIZE)
+
+DEFAULT_NUM_LANDMARKS = 16
+
+# The number of exact landmark queries that are remembered.
+LANDMARK_QUERY_CACHE_SIZE = 100000
+
+# Shared memory blocks are named from the walls key, so every process can find them.
+SHARED_MEMORY_PREFIX = 'pacai_'
+_SHARED_MEMORY_RESOURCE_TYPE = 'shared_memory'
+_SHARED_MEMORY_KEY_LENGTH = 10
+
+# The shared memory blocks this process is using, how many references it holds to each,
+# and the distances in them (which stay alive while referenced, even if the cache drops them).
+# {walls key: [block, references, MazeDistances], ...}
+_sharedBlocks = {}
+
 distanceMap = {}
 
+class MazeDistances(object):
+    """
+    The shortest path distance between every pair of open cells in a maze.
+
+    Every open cell gets an id (its index in `walls.asList(False)`),
+    and distances are kept in a dense row-major matrix indexed by those ids.
+    The matrix is a typed array (two bytes per pair on any normal board),
+    so it is a small fraction of the size of a dict of position pairs.
+    Rows are filled by a BFS from each cell over a precomputed adjacency list.
+
+    Rows are computed in order by `MazeDistances.computeRows`, which can stop on a time budget
+    and be called again later.
+    Since distances are symmetric, a pair is known as soon as either of its rows is computed.
+    """
+
+    def __init__(self, walls, matrix = None, owner = None):
+        """
+        If a matrix is given, it must be the full matrix of a MazeDistances for the same walls.
+        Otherwise, no rows are computed until `MazeDistances.computeRows` is called.
+        The owner is anything that needs to stay alive as long as the matrix.
+        """
+
+        self._positions, self._indexes, self._adjacency = buildCells(walls)
+        numCells = len(self._positions)
+
+        if (matrix is not None):
+            if (len(matrix) != numCells * numCells):
+                raise ValueError('Expected a matrix with %d entries, found %d.' %
+                        (numCells * numCells, len(matrix)))
+
+            self._matrix = matrix
+            self._numRowsComputed = numCells
+
+            # Set after the matrix, so the matrix is released first when these distances are gone.
+            self._owner = owner
+
+            self._typecode = matrix.format
+            if (isinstance(matrix, array.array)):
+                self._typecode = matrix.typecode
+
+            return
+
+        # Distances are always less than the number of cells.
+        typecode = 'h'
+        if (numCells > 2 ** 15):
+            typecode = 'i'
+
+        self._typecode = typecode
+        self._matrix = array.array(typecode, [_UNREACHABLE]) * (numCells * numCells)
+        self._numRowsComputed = 0
+        self._owner = owner
+
+    @staticmethod
+    def load(path, walls):
+        """
+        Load the distances saved by `MazeDistances.save` for the same walls.
+        The matrix is memory-mapped, so the file is only read as rows are used.
+        A ValueError is raised if the file does not match.
+        """
+
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        return MazeDistances.fromBuffer(data, walls)
+
+    @staticmethod
+    def fromBuffer(buffer, walls, owner = None):
+        """
+        Get distances that use the matrix in a buffer written by `MazeDistances.writeTo`
+        (or a file written by `MazeDistances.save`) without copying it.
+        The owner (like a shared memory block) is kept alive as long as the distances are.
+        A ValueError is raised if the buffer does not match.
+        """
+
+        if (len(buffer) < _CACHE_FILE_HEADER.size):
+            raise ValueError('Distance data is too short: %d bytes.' % (len(buffer)))
+
+        magic, version, byteOrder, typecode, numCells = _CACHE_FILE_HEADER.unpack_from(buffer, 0)
+
+        if (magic != _CACHE_FILE_MAGIC or version != CACHE_FILE_VERSION):
+            raise ValueError('Distance data has an unknown format.')
+
+        if (byteOrder != _getByteOrder()):
+            raise ValueError('Distance data was written with a different byte order.')
+
+        typecode = typecode.decode()
+        end = _CACHE_FILE_HEADER.size + numCells * numCells * array.array(typecode).itemsize
+        if (len(buffer) < end):
+            raise ValueError('Distance data is truncated.')
+
+        matrix = memoryview(buffer)[_CACHE_FILE_HEADER.size:end].cast(typecode)
+
+        return MazeDistances(walls, matrix, owner)
+
+    def computeRows(self, timeBudget = None):
+        """
+        Compute more rows, until they are all done or about timeBudget seconds have passed
+        (at least one row is always computed).
+        Without a time budget, all the remaining rows are computed.
+        Returns True when all the rows are computed.
+        """
+
+        numCells = len(self._positions)
+        if (timeBudget is not None):
+            endTime = time.perf_counter() + timeBudget
+
+        while (self._numRowsComputed < numCells):
+            source = self._numRowsComputed
+            start = source * numCells
+
+            row = bfs(self._adjacency, source)
+            self._matrix[start:start + numCells] = array.array(self._typecode, row)
+            self._numRowsComputed += 1
+
+            if (timeBudget is not None and time.perf_counter() >= endTime):
+                break
+
+        return self.isComplete()
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the maze distance between two open grid positions,
+        or None if either position is not an open cell or neither row is computed yet.
+        Cells that can not reach each other are `UNREACHABLE_DISTANCE` apart.
+        """
+
+        index1 = self._indexes.get(pos1)
+        index2 = self._indexes.get(pos2)
+
+        if (index1 is None or index2 is None):
+            return None
+
+        return self.getDistanceByIndex(index1, index2)
+
+    def getDistanceByIndex(self, index1, index2):
+        """
+        Get the distance between two cell ids, or None if neither row is computed yet.
+        """
+
+        if (index1 >= self._numRowsComputed):
+            if (index2 >= self._numRowsComputed):
+                return None
+
+            index1, index2 = index2, index1
+
+        distance = self._matrix[index1 * len(self._positions) + index2]
+        if (distance == _UNREACHABLE):
+            return UNREACHABLE_DISTANCE
+
+        return distance
+
+    def getDistancesByIndex(self, source, targets):
+        """
+        Get the distance from a cell id to each of the target ids.
+        Like `MazeDistances.getDistanceByIndex`, a distance is None if neither row is computed.
+        """
+
+        if (source >= self._numRowsComputed):
+            return [self.getDistanceByIndex(source, target) for target in targets]
+
+        row = self._matrix[source * len(self._positions):(source + 1) * len(self._positions)]
+        distances = [row[target] for target in targets]
+
+        if (_UNREACHABLE in distances):
+            return [UNREACHABLE_DISTANCE if (distance == _UNREACHABLE) else distance
+                    for distance in distances]
+
+        return distances
+
+    def getIndex(self, position):
+        """
+        Get the id of an open cell, or None if the position is not an open cell.
+        """
+
+        return self._indexes.get(position)
+
+    def getLowerBoundByIndex(self, index1, index2):
+        """
+        The table is exact, so this is the same as `MazeDistances.getDistanceByIndex`.
+        """
+
+        return self.getDistanceByIndex(index1, index2)
+
+    def getNumBytes(self):
+        """
+        Get the size of the buffer needed by `MazeDistances.writeTo`.
+        """
+
+        return _CACHE_FILE_HEADER.size + len(self._matrix) * self._matrix.itemsize
+
+    def getNumCells(self):
+        return len(self._positions)
+
+    def getNumRowsComputed(self):
+        return self._numRowsComputed
+
+    def getPosition(self, index):
+        return self._positions[index]
+
+    def getProgress(self):
+        """
+        Get the fraction (in [0, 1]) of the rows that have been computed.
+        """
+
+        if (len(self._positions) == 0):
+            return 1.0
+
+        return self._numRowsComputed / len(self._positions)
+
+    def isComplete(self):
+        return self._numRowsComputed == len(self._positions)
+
+    def save(self, path):
+        """
+        Save the (complete) distances to a file that `MazeDistances.load` can read.
+        The file is written to a temp file first and then moved into place,
+        so readers never see a partial file.
+        """
+
+        if (not self.isComplete()):
+            raise ValueError('Only complete distances can be saved.')
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok = True)
+
+        handle, tempPath = tempfile.mkstemp(dir = directory, prefix = '.distances-')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                file.write(self._getHeader())
+                file.write(self._matrix)
+
+            os.replace(tempPath, path)
+        except BaseException:
+            os.remove(tempPath)
+            raise
+
+    def writeTo(self, buffer):
+        """
+        Write the (complete) distances into a writable buffer,
+        which `MazeDistances.fromBuffer` can then use.
+        """
+
+        if (not self.isComplete()):
+            raise ValueError('Only complete distances can be written.')
+
+        header = self._getHeader()
+        buffer[:len(header)] = header
+
+        numBytes = len(self._matrix) * self._matrix.itemsize
+        buffer[len(header):len(header) + numBytes] = memoryview(self._matrix).cast('B')
+
+    def _getHeader(self):
+        return _CACHE_FILE_HEADER.pack(_CACHE_FILE_MAGIC, CACHE_FILE_VERSION, _getByteOrder(),
+                self._typecode.encode(), len(self._positions))
+
+class LandmarkDistances(object):
+    """
+    Maze distances for boards that are too big for a full table (see `MazeDistances`).
+
+    BFS distances are only kept from a few landmark cells.
+    Each landmark is the cell farthest from all the landmarks before it,
+    so they end up spread around the edges of the board (and cover every disconnected area).
+    For any landmark L, the triangle inequality gives |d(L, a) - d(L, b)| <= d(a, b),
+    so the best landmark is an O(k) lower bound (`LandmarkDistances.getLowerBoundByIndex`).
+    Exact distances come from an A* search that uses this bound as its heuristic (ALT),
+    and recent answers are cached.
+
+    Like table rows, landmarks are computed a few at a time by `LandmarkDistances.computeRows`.
+    Queries answer None until all the landmarks are ready.
+    """
+
+    def __init__(self, walls, numLandmarks = DEFAULT_NUM_LANDMARKS):
+        self._positions, self._indexes, self._adjacency = buildCells(walls)
+        self._numLandmarks = min(numLandmarks, len(self._positions))
+
+        self._landmarks = []
+
+        # The distance from every landmark to every cell (_UNREACHABLE if it can't be reached).
+        # [[distance to cell, ...], ...]
+        self._landmarkDistances = []
+
+        # The distance from every cell to its closest landmark (None if no landmark reaches it).
+        self._closestLandmarkDistances = [None] * len(self._positions)
+
+        # The distance to each landmark for every cell, built when all the landmarks are ready.
+        # [(distance to landmark, ...), ...]
+        self._cellVectors = None
+
+        # {(smaller id, larger id): distance, ...}
+        self._queryCache = LRUCache(LANDMARK_QUERY_CACHE_SIZE)
+
+    def computeRows(self, timeBudget = None):
+        """
+        Compute more landmarks, until they are all done or about timeBudget seconds have passed
+        (at least one landmark is always computed).
+        Returns True when all the landmarks are computed.
+        """
+
+        if (timeBudget is not None):
+            endTime = time.perf_counter() + timeBudget
+
+        while (len(self._landmarks) < self._numLandmarks):
+            landmark = self._getNextLandmark()
+            distances = bfs(self._adjacency, landmark)
+
+            self._landmarks.append(landmark)
+            self._landmarkDistances.append(distances)
+
+            for index, distance in enumerate(distances):
+                closest = self._closestLandmarkDistances[index]
+                if (distance != _UNREACHABLE and (closest is None or distance < closest)):
+                    self._closestLandmarkDistances[index] = distance
+
+            if (timeBudget is not None and time.perf_counter() >= endTime):
+                break
+
+        if (self.isComplete() and self._cellVectors is None):
+            self._cellVectors = list(zip(*self._landmarkDistances))
+
+        return self.isComplete()
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the exact maze distance between two open grid positions,
+        or None if either position is not an open cell or the landmarks are not ready.
+        Cells that can not reach each other are `UNREACHABLE_DISTANCE` apart.
+        """
+
+        index1 = self._indexes.get(pos1)
+        index2 = self._indexes.get(pos2)
+
+        if (index1 is None or index2 is None):
+            return None
+
+        return self.getDistanceByIndex(index1, index2)
+
+    def getDistanceByIndex(self, index1, index2):
+        if (self._cellVectors is None):
+            return None
+
+        if (index1 == index2):
+            return 0
+
+        key = (min(index1, index2), max(index1, index2))
+
+        distance = self._queryCache.get(key)
+        if (distance is None):
+            distance = self._search(index1, index2)
+            self._queryCache.put(key, distance)
+
+        return distance
+
+    def getDistancesByIndex(self, source, targets):
+        """
+        Get the exact distance from a cell id to each of the target ids.
+        Targets that are not cached are all found by a single BFS from the source,
+        which stops once they have all been reached.
+        """
+
+        if (self._cellVectors is None):
+            return [None] * len(targets)
+
+        distances = {}
+        for target in targets:
+            distance = self._queryCache.get((min(source, target), max(source, target)))
+            if (distance is not None):
+                distances[target] = distance
+
+        missing = {target for target in targets if (target not in distances)}
+        if (len(missing) > 0):
+            for target, distance in self._searchMany(source, missing).items():
+                distances[target] = distance
+                self._queryCache.put((min(source, target), max(source, target)), distance)
+
+        return [distances[target] for target in targets]
+
+    def getIndex(self, position):
+        return self._indexes.get(position)
+
+    def getLandmarks(self):
+        return [self._positions[landmark] for landmark in self._landmarks]
+
+    def getLowerBoundByIndex(self, index1, index2):
+        """
+        Get a lower bound on the distance between two cell ids in O(number of landmarks),
+        or None if the landmarks are not ready.
+        Cells that are reached by different landmarks are known to be `UNREACHABLE_DISTANCE` apart.
+        """
+
+        if (self._cellVectors is None):
+            return None
+
+        bound = 0
+        for (distance1, distance2) in zip(self._cellVectors[index1], self._cellVectors[index2]):
+            if ((distance1 == _UNREACHABLE) != (distance2 == _UNREACHABLE)):
+                return UNREACHABLE_DISTANCE
+
+            bound = max(bound, abs(distance1 - distance2))
+
+        return bound
+
+    def getNumCells(self):
+        return len(self._positions)
+
+    def getNumRowsComputed(self):
+        return len(self._landmarks)
+
+    def getPosition(self, index):
+        return self._positions[index]
+
+    def getProgress(self):
+        if (self._numLandmarks == 0):
+            return 1.0
+
+        return len(self._landmarks) / self._numLandmarks
+
+    def isComplete(self):
+        return len(self._landmarks) == self._numLandmarks
+
+    def _getNextLandmark(self):
+        """
+        Get the cell farthest from all the current landmarks.
+        Cells no landmark can reach come first, and ties go to the lowest id.
+        """
+
+        bestIndex = 0
+        bestDistance = -1
+
+        for index, distance in enumerate(self._closestLandmarkDistances):
+            if (distance is None):
+                return index
+
+            if (distance > bestDistance):
+                bestIndex = index
+                bestDistance = distance
+
+        return bestIndex
+
+    def _search(self, source, target):
+        """
+        A* from the source to the target, guided by the landmark lower bound.
+        The bound is consistent, so the first time the target is popped is optimal.
+        """
+
+        if (self.getLowerBoundByIndex(source, target) == UNREACHABLE_DISTANCE):
+            return UNREACHABLE_DISTANCE
+
+        adjacency = self._adjacency
+        cellVectors = self._cellVectors
+        targetVector = cellVectors[target]
+
+        def heuristic(index):
+            return max([abs(distance - targetDistance)
+                    for (distance, targetDistance) in zip(cellVectors[index], targetVector)])
+
+        costs = {source: 0}
+
+        # Break ties toward deeper nodes, they are closer to the target.
+        # [(cost + heuristic, -cost, id), ...]
+        heap = [(heuristic(source), 0, source)]
+
+        while (len(heap) > 0):
+            _, negativeCost, node = heapq.heappop(heap)
+            cost = -negativeCost
+
+            if (node == target):
+                return cost
+
+            if (cost > costs[node]):
+                # A stale entry.
+                continue
+
+            for neighbor in adjacency[node]:
+                neighborCost = cost + 1
+                if (neighborCost < costs.get(neighbor, neighborCost + 1)):
+                    costs[neighbor] = neighborCost
+                    heapq.heappush(heap,
+                            (neighborCost + heuristic(neighbor), -neighborCost, neighbor))
+
+        return UNREACHABLE_DISTANCE
+
+    def _searchMany(self, source, targets):
+        """
+        BFS from the source until every target is reached (or the source's area is exhausted).
+        Returns {target: distance, ...}.
+        """
+
+        results = {}
+        if (source in targets):
+            results[source] = 0
+
+        remaining = len(targets) - len(results)
+
+        seen = {source}
+        frontier = [source]
+        distance = 0
+        adjacency = self._adjacency
+
+        while (remaining > 0 and len(frontier) > 0):
+            distance += 1
+            nextFrontier = []
+
+            for node in frontier:
+                for neighbor in adjacency[node]:
+                    if (neighbor in seen):
+                        continue
+
+                    seen.add(neighbor)
+                    nextFrontier.append(neighbor)
+
+                    if (neighbor in targets):
+                        results[neighbor] = distance
+                        remaining -= 1
+
+            frontier = nextFrontier
+
+        for target in targets:
+            if (target not in results):
+                results[target] = UNREACHABLE_DISTANCE
+
+        return results
+
 class DistanceCalculator:
-    def __init__(self, layout, distancer):
+    def __init__(self, layout, distancer, landmarkThreshold = DEFAULT_LANDMARK_THRESHOLD):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
+        self.useLandmarks = (layout.walls.count(False) > landmarkThreshold)
 
-    def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
-
-        self.distancer._distances = self.cache[self.layout.walls]
+    def run(self, timeBudget = None):
+        if (self.useLandmarks):
+            self.distancer._distances = getLandmarkDistances(self.layout.walls, timeBudget)
+        else:
+            self.distancer._distances = getMazeDistances(self.layout.walls, timeBudget)
 
 def computeDistances(layout):
     """
-    Runs UCS to all other positions from each position.
+    Runs a BFS to all other positions from each position.
     """
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    distances = MazeDistances(layout.walls)
+    distances.computeRows()
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+    return distances
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+def getCacheDir():
+    """
+    Get the directory that distances are saved in, or None if the disk cache is off.
+    See `CACHE_DIR_ENV`.
+    """
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+    cacheDir = os.environ.get(CACHE_DIR_ENV, '')
+    if (cacheDir == ''):
+        return None
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
+    return cacheDir
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+def getLandmarkDistances(walls, timeBudget = None):
+    """
+    Get the landmark distances for a wall grid, shared by everyone in this process.
+    A time budget works the same as in `getMazeDistances`.
+    """
+
+    key = getWallsKey(walls)
+
+    distances = _landmarkDistancesCache.get(key)
+    if (distances is None):
+        distances = LandmarkDistances(walls)
+        _landmarkDistancesCache.put(key, distances)
+
+    if (not distances.isComplete()):
+        distances.computeRows(timeBudget)
+
+    return distances
+
+def getMazeDistances(walls, timeBudget = None):
+    """
+    Get the distances for a wall grid.
+    Distances are computed once per process for each distinct wall grid
+    (as long as they stay among the recently used ones, see `DEFAULT_DISTANCES_CACHE_BYTES`),
+    and, if the disk cache is on, are kept in the cache directory (see `getCacheDir`)
+    so other processes and later runs can just map them in.
+    Problems with the cache directory are logged, and the distances are just computed.
+
+    With a time budget (in seconds), only compute for about that long
+    (see `MazeDistances.computeRows`), the returned distances may not be complete yet.
+    The next call for the same walls picks up where this one left off.
+    """
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+    key = getWallsKey(walls)
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+    path = None
+    cacheDir = getCacheDir()
+    if (cacheDir is not None):
+        path = os.path.join(cacheDir, 'distances-v%d-%s.bin' % (CACHE_FILE_VERSION, key.hex()))
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+    distances = _mazeDistancesCache.get(key)
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+    if (distances is None and key in _sharedBlocks):
+        distances = _sharedBlocks[key][2]
+        _mazeDistancesCache.put(key, distances)
 
-            for other in adjacent:
-                if other not in dist:
-                    continue
+    if (distances is None):
+        if (path is not None and os.path.isfile(path)):
+            try:
+                distances = MazeDistances.load(path, walls)
+            except (OSError, ValueError) as ex:
+                logging.warning('Could not load maze distances from %s: %s' % (path, ex))
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+        if (distances is None):
+            distances = MazeDistances(walls)
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+        _mazeDistancesCache.put(key, distances)
+
+    if (distances.isComplete()):
+        return distances
+
+    if (distances.computeRows(timeBudget) and path is not None):
+        try:
+            distances.save(path)
+        except OSError as ex:
+            logging.warning('Could not save maze distances to %s: %s' % (path, ex))
 
     return distances
 
+def getWallsKey(walls):
+    """
+    Get a stable (across processes and runs) hash of a wall grid.
+    """
+
+    width = walls.getWidth()
+    height = walls.getHeight()
+    data = struct.pack('<II', width, height) + BitGrid.fromGrid(walls).toBytes()
+
+    return hashlib.blake2b(data, digest_size = 16).digest()
+
+def getSharedMemoryName(walls):
+    return SHARED_MEMORY_PREFIX + getWallsKey(walls)[:_SHARED_MEMORY_KEY_LENGTH].hex()
+
+def publishMazeDistances(walls):
+    """
+    Put the distances for a wall grid into shared memory,
+    so other processes on this machine can use them without their own copy.
+    Other processes take a reference with `attachMazeDistances`,
+    after which `getMazeDistances` (and so every `Distancer`) there uses the shared distances.
+    The distances are computed (or loaded) first if needed.
+
+    The publisher holds a reference to the block until `unpublishMazeDistances`.
+    Returns the name of the shared memory block.
+    """
+
+    if (shared_memory is None):
+        raise RuntimeError('Shared memory is not available in this version of Python.')
+
+    key = getWallsKey(walls)
+    if (key in _sharedBlocks):
+        _sharedBlocks[key][1] += 1
+        return _sharedBlocks[key][0].name
+
+    distances = getMazeDistances(walls)
+
+    block = shared_memory.SharedMemory(name = getSharedMemoryName(walls), create = True,
+            size = distances.getNumBytes())
+    distances.writeTo(block.buf)
+
+    # Use the shared copy here too, so the publisher does not keep two copies.
+    distances = MazeDistances.fromBuffer(block.buf, walls, block)
+    _sharedBlocks[key] = [block, 1, distances]
+    _mazeDistancesCache.put(key, distances)
+
+    return block.name
+
+def attachMazeDistances(walls):
+    """
+    Take a reference to the published distances for a wall grid.
+    Returns the distances, or None if they are not published.
+    While this process holds a reference, `getMazeDistances` uses the shared distances.
+    Every attach that returns distances must be matched by a `releaseMazeDistances`.
+    """
+
+    key = getWallsKey(walls)
+
+    entry = _sharedBlocks.get(key)
+    if (entry is not None):
+        entry[1] += 1
+        distances = entry[2]
+    else:
+        distances = _attachSharedBlock(key, walls)
+
+    if (distances is not None):
+        _mazeDistancesCache.put(key, distances)
+
+    return distances
+
+def releaseMazeDistances(walls):
+    """
+    Drop a reference taken by `attachMazeDistances` (or `publishMazeDistances`).
+    When this process holds no more references, the block is closed here.
+    Any `MazeDistances` still using the block keep it mapped until they are gone.
+    """
+
+    key = getWallsKey(walls)
+
+    entry = _sharedBlocks.get(key)
+    if (entry is None):
+        return
+
+    entry[1] -= 1
+    if (entry[1] > 0):
+        return
+
+    block = entry[0]
+    del _sharedBlocks[key]
+
+    if (_mazeDistancesCache.get(key) is entry[2]):
+        _mazeDistancesCache.remove(key)
+
+    entry = None
+
+    try:
+        block.close()
+    except BufferError:
+        # Someone still has distances that use the block.
+        # It will be unmapped when they are garbage collected.
+        pass
+
+def unpublishMazeDistances(walls):
+    """
+    Remove published distances, so no new processes can attach to them,
+    and drop the publisher's reference.
+    Processes that are already attached can keep using them.
+    """
+
+    key = getWallsKey(walls)
+
+    entry = _sharedBlocks.get(key)
+    if (entry is None):
+        return
+
+    # Unlinking unregisters the block from the resource tracker,
+    # and a forked process that attached may have already unregistered it (see `_untrack`).
+    if (not _SHARED_MEMORY_HAS_TRACK):
+        _retrack(entry[0])
+
+    entry[0].unlink()
+    releaseMazeDistances(walls)
+
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-        return distances[key]
+    distance = distances.getDistance(pos1, pos2)
+    if (distance is None):
+        return DEFAULT_DISTANCE
+
+    return distance
+
+def _attachSharedBlock(key, walls):
+    """
+    Attach to a published block and take a reference to it.
+    Returns None if there is no such block (or shared memory is not available).
+    """
+
+    if (shared_memory is None):
+        return None
+
+    name = SHARED_MEMORY_PREFIX + key[:_SHARED_MEMORY_KEY_LENGTH].hex()
+
+    # Attaching must not register the block with the resource tracker,
+    # or the tracker would unlink it (out from under the other processes) when this process exits.
+    try:
+        if (_SHARED_MEMORY_HAS_TRACK):
+            block = shared_memory.SharedMemory(name = name, track = False)
+        else:
+            block = shared_memory.SharedMemory(name = name)
+            _untrack(block)
+    except FileNotFoundError:
+        return None
+
+    try:
+        distances = MazeDistances.fromBuffer(block.buf, walls, block)
+    except ValueError as ex:
+        logging.warning('Could not use the shared maze distances in %s: %s' % (name, ex))
+        distances = None
+
+    if (distances is None):
+        block.close()
+        return None
+
+    _sharedBlocks[key] = [block, 1, distances]
+    return distances
+
+def _retrack(block):
+    """
+    Register a block with this process's resource tracker (again).
+    The tracker keeps a set of names, so this is safe if it is already registered.
+    """
+
+    if (os.name == 'posix'):
+        resource_tracker.register('/' + block.name, _SHARED_MEMORY_RESOURCE_TYPE)
+
+def _untrack(block):
+    """
+    Before Python 3.13 (and only on POSIX), opening a block always registers it with the tracker.
+    Forked processes share the publisher's tracker,
+    which is why `unpublishMazeDistances` registers the block again before unlinking it.
+    """
+
+    if (os.name == 'posix'):
+        resource_tracker.unregister('/' + block.name, _SHARED_MEMORY_RESOURCE_TYPE)
+
+def _getByteOrder():
+    if (sys.byteorder == 'little'):
+        return 0
 
-    return DEFAULT_DISTANCE
+    return 1
@@ -6,6 +6,7 @@ import abc
 
 from pacai.core.actions import Actions
 from pacai.core.search import search
+from pacai.core.search.problem import RECORD_VISITS_OFF
 from pacai.student.searchAgents import AnyFoodSearchProblem
 
 class FeatureExtractor(abc.ABC):
@@ -38,7 +39,7 @@ class SimpleExtractor(FeatureExtractor):
 
     def getFeatures(self, state, action):
         # Extract the grid of food and wall locations and get the ghost locations.
-        food = state.getFood()
+        food = state.getFoodView()
         walls = state.getWalls()
         ghosts = state.getGhostPositions()
 
@@ -51,14 +52,17 @@ class SimpleExtractor(FeatureExtractor):
         next_x, next_y = int(x + dx), int(y + dy)
 
         # Count the number of ghosts 1-step away.
+        layout = state.getInitialLayout()
         features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in
-                Actions.getLegalNeighbors(g, walls) for g in ghosts)
+                layout.getLegalNeighbors(g) for g in ghosts)
 
         # If there is no danger of ghosts then add the food feature.
         if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
             features["eats-food"] = 1.0
 
+        # This search is never displayed, so do not pay for its visit history.
         prob = AnyFoodSearchProblem(state, start = (next_x, next_y))
+        prob.setVisitRecording(RECORD_VISITS_OFF)
         dist = len(search.bfs(prob))
         if dist is not None:
             # Make the distance a number less than one otherwise the update will diverge wildly.
@@ -1,9 +1,49 @@
 import abc
-import copy
+import random
+import struct
+import sys
 
 from pacai.core.agentstate import AgentState
 from pacai.core.directions import Directions
+from pacai.core.grid import BitGrid
+from pacai.core.layout import CONTENT_HASH_SIZE
+from pacai.core.layout import getLayoutByContentHash
 from pacai.util import util
+from pacai.util.lru import LRUCache
+
+# The seed for the Zobrist keys.
+# Keys need to be stable within a process, but should not disturb the game's random state.
+ZOBRIST_SEED = 4
+ZOBRIST_BITS = 64
+
+# {(width, height): (food keys, capsule keys), ...}
+_zobristKeys = {}
+
+# About how much memory (in bytes) the successor cache may use.
+DEFAULT_SUCCESSOR_CACHE_BYTES = 32 * 1024 * 1024
+
+# The version of the format written by `AbstractGameState.toBytes`.
+STATE_BYTES_VERSION = 1
+
+# Version, layout content hash, flags, score,
+# last agent moved, last food eaten (cell index), last capsule eaten (cell index), number of agents.
+# Missing values are stored as -1.
+_STATE_HEADER = struct.Struct('<B%dsBdhiiB' % (CONTENT_HASH_SIZE))
+
+# Doubled x and y (so half steps fit), direction index, is pacman, scared timer.
+_AGENT_RECORD = struct.Struct('<hhBBH')
+
+_FLAG_GAMEOVER = 1
+_FLAG_WIN = 2
+_FLAG_FLOAT_SCORE = 4
+
+# Agents without a position (this does not happen in normal games).
+_NO_POSITION = -(1 << 15)
+
+# Directions are stored by their index here.
+_DIRECTIONS = (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST,
+        Directions.STOP)
+_DIRECTION_INDEXES = {direction: index for (index, direction) in enumerate(_DIRECTIONS)}
 
 class AbstractGameState(abc.ABC):
     """
@@ -15,6 +55,10 @@ class AbstractGameState(abc.ABC):
     Only use the accessor methods to get data about the game state.
     """
 
+    # An optional cache of successors shared by all game states.
+    # See `AbstractGameState.enableSuccessorCache`.
+    _successorCache = None
+
     def __init__(self, layout):
         self._lastAgentMoved = None
         self._gameover = False
@@ -26,6 +70,10 @@ class AbstractGameState(abc.ABC):
         # Any children should be sure to clear the hash when modifications are made.
         self._hash = None
 
+        # A Zobrist hash of the food and capsules on the board.
+        # Eating food or a capsule just xors out the key for that location.
+        self._foodKeys, self._capsuleKeys = _getZobristKeys(layout.width, layout.height)
+
         # For food and capsules, we will only copy on write (if we eat one of them).
         # This avoid additional copies on successors that don't eat.
 
@@ -33,10 +81,15 @@ class AbstractGameState(abc.ABC):
         self._food = layout.food.copy()
         self._lastFoodEaten = None
 
+        # Keep a running count of the food, so nobody has to count the grid.
+        self._numFood = self._food.count()
+
         self._capsulesCopied = False
         self._capsules = layout.capsules.copy()
         self._lastCapsuleEaten = None
 
+        self._boardHash = self._computeBoardHash()
+
         # An ordered list of locations that this state considers special.
         # A view may choose to specially represent these locations.
         self._highlightLocations = []
@@ -47,14 +100,50 @@ class AbstractGameState(abc.ABC):
 
         self._score = 0
 
-    @abc.abstractmethod
     def generateSuccessor(self, agentIndex, action):
         """
         Returns the successor state after the specified agent takes the action.
         Treat the returned state as a SHALLOW copy that has been modified.
+
+        When the successor cache is enabled (see `AbstractGameState.enableSuccessorCache`),
+        the successor may be a copy of a cached one.
         """
 
-        pass
+        # Check that successors exist.
+        if (self.isOver()):
+            raise RuntimeError("Can't generate successors of a terminal state.")
+
+        cache = AbstractGameState._successorCache
+        if (cache is None):
+            return self._generateSuccessor(agentIndex, action)
+
+        return self._getCachedSuccessor(cache, agentIndex, action)
+
+    def generateSuccessors(self, agentIndex):
+        """
+        Get an (action, successor) pair for every legal action of the agent,
+        in the same order as `AbstractGameState.getLegalActions`.
+
+        This gives the same successors as calling `AbstractGameState.generateSuccessor`
+        for each legal action, but the legal actions are only computed once
+        (instead of once to list them and again to check every action).
+        The successor cache is used the same way.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't generate successors of a terminal state.")
+
+        cache = AbstractGameState._successorCache
+
+        successors = []
+        for action in self.getLegalActions(agentIndex):
+            if (cache is None):
+                successors.append((action, self._generateSuccessor(agentIndex, action, False)))
+            else:
+                successors.append((action, self._getCachedSuccessor(cache, agentIndex, action,
+                        False)))
+
+        return successors
 
     @abc.abstractmethod
     def getLegalActions(self, agentIndex = 0):
@@ -68,6 +157,35 @@ class AbstractGameState(abc.ABC):
         self._hash = None
         self._score += score
 
+    def applyAction(self, agentIndex, action):
+        """
+        Apply the action to this state in place, instead of creating a successor.
+        Returns an undo record that must be passed to `AbstractGameState.undoAction`
+        to put this state back the way it was.
+
+        This is meant for tree searches that visit many children and throw them away.
+        Undo records must be undone in the reverse order they were made,
+        and the state must not be handed to anyone else while actions are applied.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't apply actions to a terminal state.")
+
+        record = self._getUndoRecord()
+
+        # Food and capsules may be shared with other states (or the undo record),
+        # so make sure that they are copied on write.
+        self._foodCopied = False
+        self._capsulesCopied = False
+
+        try:
+            self._applySuccessorAction(agentIndex, action)
+        except Exception:
+            self.undoAction(record)
+            raise
+
+        return record
+
     def eatCapsule(self, x, y):
         """
         Mark the capsule at the given location as eaten.
@@ -82,6 +200,7 @@ class AbstractGameState(abc.ABC):
 
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
+        self._boardHash ^= self._capsuleKeys[self._cellIndex(x, y)]
 
         self._hash = None
         return True
@@ -100,16 +219,131 @@ class AbstractGameState(abc.ABC):
 
         self._food[x][y] = False
         self._lastFoodEaten = (x, y)
+        self._numFood -= 1
+        self._boardHash ^= self._foodKeys[self._cellIndex(x, y)]
 
         self._hash = None
         return True
 
+    @staticmethod
+    def disableSuccessorCache():
+        """
+        Turn off (and drop) the successor cache.
+        """
+
+        AbstractGameState._successorCache = None
+
+    @staticmethod
+    def enableSuccessorCache(maxBytes = DEFAULT_SUCCESSOR_CACHE_BYTES):
+        """
+        Start caching successors for all game states.
+        Successors are keyed by the parent state, the agent, and the action,
+        and the least recently used successors are evicted once the cache holds
+        about maxBytes of memory (see `_getSuccessorCacheEntryBytes`).
+
+        Cached successors are never handed out, callers get their own (shallow) copy.
+        So callers can change their successors (e.g. end the game or set highlights)
+        the same way as without the cache.
+        """
+
+        AbstractGameState._successorCache = LRUCache(maxBytes,
+                sizeFunction = _getSuccessorCacheEntryBytes)
+
     def endGame(self, win):
         self._gameover = True
         self._win = win
 
         self._hash = None
 
+    @classmethod
+    def fromBytes(cls, data, layout = None):
+        """
+        Rebuild a state from the bytes made by `AbstractGameState.toBytes`.
+        If no layout is given, then the layout is found by its content hash
+        among the layouts that are alive in this process
+        (see `pacai.core.layout.getLayoutByContentHash`).
+        A ValueError is raised if the bytes are malformed or the layout does not match.
+        """
+
+        if (len(data) < _STATE_HEADER.size):
+            raise ValueError('State bytes are too short: %d bytes.' % (len(data)))
+
+        (version, contentHash, flags, score, lastAgentMoved, lastFoodEaten, lastCapsuleEaten,
+                numAgents) = _STATE_HEADER.unpack_from(data, 0)
+
+        if (version != STATE_BYTES_VERSION):
+            raise ValueError('Unknown state bytes version: %d.' % (version))
+
+        if (layout is None):
+            layout = getLayoutByContentHash(contentHash)
+            if (layout is None):
+                raise ValueError('No layout with content hash: %s.' % (contentHash.hex()))
+        elif (layout.getContentHash() != contentHash):
+            raise ValueError('State bytes were made for a different layout (%s != %s).' %
+                    (contentHash.hex(), layout.getContentHash().hex()))
+
+        if (numAgents != len(layout.agentPositions)):
+            raise ValueError('Expected %d agents, found %d.' %
+                    (len(layout.agentPositions), numAgents))
+
+        offset = _STATE_HEADER.size
+        numCapsuleBytes = (len(layout.capsules) + 7) // 8
+        numFoodBytes = BitGrid.getNumBytes(layout.width, layout.height)
+
+        if (len(data) < offset + numAgents * _AGENT_RECORD.size + numCapsuleBytes + numFoodBytes):
+            raise ValueError('State bytes are too short: %d bytes.' % (len(data)))
+
+        agentSnapshots = []
+        for i in range(numAgents):
+            x, y, directionIndex, isPacman, scaredTimer = _AGENT_RECORD.unpack_from(data, offset)
+            offset += _AGENT_RECORD.size
+
+            if (directionIndex >= len(_DIRECTIONS)):
+                raise ValueError('Unknown direction index: %d.' % (directionIndex))
+
+            position = None
+            if (x != _NO_POSITION):
+                position = (_unpackCoordinate(x), _unpackCoordinate(y))
+
+            agentSnapshots.append((position, _DIRECTIONS[directionIndex], isPacman == 1,
+                    scaredTimer, None))
+
+        capsuleMask = int.from_bytes(data[offset:offset + numCapsuleBytes], 'little')
+        offset += numCapsuleBytes
+
+        capsules = [capsule for (i, capsule) in enumerate(layout.capsules)
+                if ((capsuleMask >> i) & 1)]
+
+        food = BitGrid.fromBytes(layout.width, layout.height, data[offset:offset + numFoodBytes])
+        offset += numFoodBytes
+
+        state = cls._newFromBytes(layout, bytes(data[offset:]))
+
+        if (not flags & _FLAG_FLOAT_SCORE):
+            score = int(score)
+
+        state._score = score
+        state._gameover = (flags & _FLAG_GAMEOVER) != 0
+        state._win = (flags & _FLAG_WIN) != 0
+
+        if (lastAgentMoved >= 0):
+            state._lastAgentMoved = lastAgentMoved
+
+        if (lastFoodEaten >= 0):
+            state._lastFoodEaten = divmod(lastFoodEaten, layout.height)
+
+        if (lastCapsuleEaten >= 0):
+            state._lastCapsuleEaten = divmod(lastCapsuleEaten, layout.height)
+
+        state._setBoard(food, capsules)
+
+        for agentState, snapshot in zip(state._agentStates, agentSnapshots):
+            agentState.restore(snapshot)
+
+        state._hash = None
+
+        return state
+
     def getAgentPosition(self, index):
         """
         Returns a location tuple of the agent with the given index.
@@ -144,11 +378,21 @@ class AbstractGameState(abc.ABC):
         Grids can be accessed via list notation.
         So to check if there is food at (x, y), just do something like: food[x][y].
 
-        Callers should favor hasFood() over this, since this will make a copy of the grid.
+        Callers should favor hasFood() or getFoodView() over this,
+        since this will make a copy of the grid.
         """
 
         return self._food.copy()
 
+    def getFoodView(self):
+        """
+        Returns a read-only Grid of boolean food indicator variables.
+        This grid supports the same reads as the one from getFood(),
+        but does not copy the food and will raise an error on any modification.
+        """
+
+        return self._food.view()
+
     def getHighlightLocations(self):
         return self._highlightLocations
 
@@ -188,11 +432,23 @@ class AbstractGameState(abc.ABC):
         Get the amount of food left on the board.
         """
 
-        return self._food.count()
+        return self._numFood
 
     def getScore(self):
         return self._score
 
+    @staticmethod
+    def getSuccessorCacheStats():
+        """
+        Get the hit/miss counters of the successor cache,
+        or None if the cache is not enabled.
+        """
+
+        if (AbstractGameState._successorCache is None):
+            return None
+
+        return AbstractGameState._successorCache.getStats()
+
     def getWalls(self):
         """
         Returns a Grid of boolean wall indicator variables.
@@ -242,6 +498,164 @@ class AbstractGameState(abc.ABC):
         self._score = score
         self._hash = None
 
+    def toBytes(self):
+        """
+        Get a compact binary encoding of this state.
+        The layout is not included, only its content hash.
+        So the reader needs to have the same layout (see `AbstractGameState.fromBytes`).
+        Highlight locations are only for display, and are not kept.
+
+        The encoding is a fixed header, a small record for each agent,
+        a bitmask over the layout's capsules, the food as a bitmask (see `BitGrid.toBytes`),
+        and then any extra bytes from the child class.
+        """
+
+        flags = 0
+        if (self._gameover):
+            flags |= _FLAG_GAMEOVER
+
+        if (self._win):
+            flags |= _FLAG_WIN
+
+        if (isinstance(self._score, float)):
+            flags |= _FLAG_FLOAT_SCORE
+
+        lastAgentMoved = -1
+        if (self._lastAgentMoved is not None):
+            lastAgentMoved = self._lastAgentMoved
+
+        lastFoodEaten = -1
+        if (self._lastFoodEaten is not None):
+            lastFoodEaten = self._cellIndex(*self._lastFoodEaten)
+
+        lastCapsuleEaten = -1
+        if (self._lastCapsuleEaten is not None):
+            lastCapsuleEaten = self._cellIndex(*self._lastCapsuleEaten)
+
+        parts = [_STATE_HEADER.pack(STATE_BYTES_VERSION, self._layout.getContentHash(), flags,
+                self._score, lastAgentMoved, lastFoodEaten, lastCapsuleEaten,
+                len(self._agentStates))]
+
+        for agentState in self._agentStates:
+            x = y = _NO_POSITION
+            position = agentState.getPosition()
+            if (position is not None):
+                x = _packCoordinate(position[0])
+                y = _packCoordinate(position[1])
+
+            parts.append(_AGENT_RECORD.pack(x, y, _DIRECTION_INDEXES[agentState.getDirection()],
+                    int(agentState.isPacman()), agentState.getScaredTimer()))
+
+        capsules = set(self._capsules)
+        capsuleMask = 0
+        for (i, capsule) in enumerate(self._layout.capsules):
+            if (capsule in capsules):
+                capsuleMask |= (1 << i)
+
+        parts.append(capsuleMask.to_bytes((len(self._layout.capsules) + 7) // 8, 'little'))
+        parts.append(self._food.toBytes())
+        parts.append(self._getExtraBytes())
+
+        return b''.join(parts)
+
+    def undoAction(self, record):
+        """
+        Undo an action applied with `AbstractGameState.applyAction`.
+        """
+
+        self._restoreUndoRecord(record)
+
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action, checkLegal = True):
+        """
+        Apply the action to the context state (self).
+        Callers that already know the action is legal can skip checking it again.
+        """
+
+        pass
+
+    def _cellIndex(self, x, y):
+        return x * self._layout.height + y
+
+    def _computeBoardHash(self):
+        boardHash = 0
+
+        for index in self._food.getCellIndexes():
+            boardHash ^= self._foodKeys[index]
+
+        for (x, y) in self._capsules:
+            boardHash ^= self._capsuleKeys[self._cellIndex(x, y)]
+
+        return boardHash
+
+    def _generateSuccessor(self, agentIndex, action, checkLegal = True):
+        successor = self._initSuccessor()
+        successor._applySuccessorAction(agentIndex, action, checkLegal)
+
+        return successor
+
+    def _getCachedSuccessor(self, cache, agentIndex, action, checkLegal = True):
+        key = self._getSuccessorCacheKey(agentIndex, action)
+
+        successor = cache.get(key)
+        if (successor is None):
+            successor = self._generateSuccessor(agentIndex, action, checkLegal)
+            cache.put(key, successor)
+
+        # Changes to the copy never reach the cached successor.
+        copy = successor._initSuccessor()
+        copy._hash = successor._hash
+
+        return copy
+
+    def _getExtraBytes(self):
+        """
+        Get the bytes for any fields that a child adds to the state.
+        These are passed back to `AbstractGameState._newFromBytes` by `AbstractGameState.fromBytes`.
+        """
+
+        return b''
+
+    def _getSuccessorCacheKey(self, agentIndex, action):
+        """
+        Get the key for a successor in the successor cache.
+
+        The key holds the values that state equality looks at instead of this state,
+        so the cache does not keep parent states alive
+        (and changes to the parent can not break the key).
+        Equal states can still differ in the fields that successors inherit without
+        looking at them (like the last food eaten), so those fields are part of the key.
+        Highlights are compared by identity,
+        the cached successor shares the list so its id is stable.
+        """
+
+        agents = tuple((agentState.getPosition(), agentState.getDirection(),
+                agentState.isPacman(), agentState.getScaredTimer())
+                for agentState in self._agentStates)
+
+        highlightKey = None
+        if (len(self._highlightLocations) > 0):
+            highlightKey = id(self._highlightLocations)
+
+        return (type(self), self._layout, self._score, self._gameover, self._win,
+                self._food.view(), tuple(self._capsules), agents,
+                agentIndex, action, self._lastFoodEaten, self._lastCapsuleEaten, highlightKey)
+
+    def _getUndoRecord(self):
+        """
+        Get everything that applying an action may change.
+        Food and capsules are copied on write, so holding references to them is enough.
+        Children that keep more information should extend this record.
+        """
+
+        return (
+            self._score, self._gameover, self._win, self._lastAgentMoved,
+            self._food, self._foodCopied, self._lastFoodEaten, self._numFood,
+            self._capsules, self._capsulesCopied, self._lastCapsuleEaten,
+            self._boardHash, self._hash,
+            [agentState.snapshot() for agentState in self._agentStates],
+        )
+
     def _initSuccessor(self):
         """
         Get a state that will eventually serve as a successor.
@@ -249,7 +663,9 @@ class AbstractGameState(abc.ABC):
         """
 
         # Start with a shallow copy.
-        successor = copy.copy(self)
+        # Copying the dict directly is much faster than copy.copy().
+        successor = object.__new__(type(self))
+        successor.__dict__.update(self.__dict__)
         successor._hash = None
 
         # Leave food and capsules as a shallow copy, but mark them to be copied on write.
@@ -261,6 +677,46 @@ class AbstractGameState(abc.ABC):
 
         return successor
 
+    @classmethod
+    def _newFromBytes(cls, layout, extraData):
+        """
+        Get a fresh state for `AbstractGameState.fromBytes` to fill in.
+        Children that take more constructor arguments (or write extra bytes) should override this.
+        """
+
+        if (len(extraData) != 0):
+            raise ValueError('Found %d unexpected bytes at the end of the state.' %
+                    (len(extraData)))
+
+        return cls(layout)
+
+    def _restoreUndoRecord(self, record):
+        (
+            self._score, self._gameover, self._win, self._lastAgentMoved,
+            self._food, self._foodCopied, self._lastFoodEaten, self._numFood,
+            self._capsules, self._capsulesCopied, self._lastCapsuleEaten,
+            self._boardHash, self._hash,
+            agentSnapshots,
+        ) = record
+
+        for agentState, snapshot in zip(self._agentStates, agentSnapshots):
+            agentState.restore(snapshot)
+
+    def _setBoard(self, food, capsules):
+        """
+        Replace all the food and capsules on the board.
+        """
+
+        self._food = food
+        self._foodCopied = True
+        self._numFood = food.count()
+
+        self._capsules = capsules
+        self._capsulesCopied = True
+
+        self._boardHash = self._computeBoardHash()
+        self._hash = None
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -272,6 +728,10 @@ class AbstractGameState(abc.ABC):
         if (type(self) != type(other)):
             return False
 
+        # Hashes are cheap to get, so unequal hashes can rule out most states.
+        if (hash(self) != hash(other)):
+            return False
+
         # Note that not all fields are being used because we are checking if two states are equal,
         # not is they got to this confiruation in the same way.
 
@@ -288,8 +748,67 @@ class AbstractGameState(abc.ABC):
                 and self._layout == other._layout)
 
     def __hash__(self):
+        """
+        Food and capsules are covered by the incrementally maintained Zobrist board hash,
+        and agent states cache their own hashes.
+        So rebuilding this hash only costs a few operations per agent.
+        """
+
         if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+            self._hash = util.buildHash(self._score, self._gameover, self._win, self._boardHash,
+                *self._agentStates, self._layout)
 
         return self._hash
+
+def _getSuccessorCacheEntryBytes(key, successor):
+    """
+    Estimate the memory used by an entry in the successor cache.
+    Food and capsules are only counted if the successor has its own copy,
+    otherwise they are shared with other states.
+    """
+
+    size = sys.getsizeof(key) + sys.getsizeof(successor) + sys.getsizeof(successor.__dict__)
+
+    size += sys.getsizeof(successor._agentStates)
+    for agentState in successor._agentStates:
+        size += sys.getsizeof(agentState)
+
+    if (successor._foodCopied):
+        food = successor._food
+        size += sys.getsizeof(food) + (food.getWidth() * food.getHeight() + 7) // 8
+
+    if (successor._capsulesCopied):
+        size += sys.getsizeof(successor._capsules)
+
+    return size
+
+def _getZobristKeys(width, height):
+    """
+    Get the random keys for food and capsules for a board of the given size.
+    Keys are shared between all boards of the same size.
+    """
+
+    size = (width, height)
+    if (size not in _zobristKeys):
+        rng = random.Random(ZOBRIST_SEED)
+        numCells = width * height
+
+        foodKeys = [rng.getrandbits(ZOBRIST_BITS) for i in range(numCells)]
+        capsuleKeys = [rng.getrandbits(ZOBRIST_BITS) for i in range(numCells)]
+
+        _zobristKeys[size] = (foodKeys, capsuleKeys)
+
+    return _zobristKeys[size]
+
+def _packCoordinate(value):
+    doubled = value * 2
+    if (doubled != int(doubled)):
+        raise ValueError('Positions must be on half steps to be packed, found: %s.' % (value))
+
+    return int(doubled)
+
+def _unpackCoordinate(doubled):
+    if (doubled % 2 == 0):
+        return doubled // 2
+
+    return doubled / 2
@@ -55,6 +55,9 @@ class Grid:
         if (other is None):
             return False
 
+        if (isinstance(other, BitGrid)):
+            return other == self
+
         return self._data == other._data
 
     def __getitem__(self, i):
@@ -82,3 +85,280 @@ class Grid:
         out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class BitGrid:
+    """
+    A 2-dimensional array of booleans backed by a single arbitrary-precision integer.
+    The cell (x, y) is stored in bit (x * height + y),
+    so the bit layout (and hash) matches the one used by `Grid`.
+
+    Since integers are immutable, copies share storage and are O(1).
+    Counting uses a popcount, and the hash is cached until the next write.
+    Data is still accessed via grid[x][y].
+    """
+
+    def __init__(self, width, height, initialValue = False):
+        if (not isinstance(initialValue, bool)):
+            raise ValueError('Grids can only contain booleans')
+
+        self._width = width
+        self._height = height
+
+        self._bits = 0
+        if (initialValue):
+            self._bits = (1 << (width * height)) - 1
+
+        self._hash = None
+
+    @staticmethod
+    def fromGrid(grid):
+        """
+        Build a BitGrid with the same contents as any other grid.
+        """
+
+        bitGrid = BitGrid(grid.getWidth(), grid.getHeight())
+        for (x, y) in grid.asList():
+            bitGrid._bits |= (1 << (x * bitGrid._height + y))
+
+        return bitGrid
+
+    @staticmethod
+    def fromBytes(width, height, data):
+        """
+        Build a BitGrid from bytes made by `BitGrid.toBytes`.
+        """
+
+        if (len(data) != BitGrid.getNumBytes(width, height)):
+            raise ValueError('Expected %d bytes for a %dx%d grid, found %d.' %
+                    (BitGrid.getNumBytes(width, height), width, height, len(data)))
+
+        bitGrid = BitGrid(width, height)
+        bitGrid._bits = int.from_bytes(data, 'little')
+
+        if (bitGrid._bits >> (width * height) != 0):
+            raise ValueError('Grid bytes have cells set outside of a %dx%d grid.' % (width, height))
+
+        return bitGrid
+
+    @staticmethod
+    def getNumBytes(width, height):
+        """
+        Get the number of bytes used by `BitGrid.toBytes` for a grid of this size.
+        """
+
+        return (width * height + 7) // 8
+
+    def asList(self, key = True):
+        return [self._cellIndexToPosition(index) for index in self.getCellIndexes(key)]
+
+    def copy(self):
+        grid = BitGrid.__new__(BitGrid)
+        grid._width = self._width
+        grid._height = self._height
+        grid._bits = self._bits
+        grid._hash = self._hash
+
+        return grid
+
+    def count(self, item = True):
+        numTrue = bin(self._bits).count('1')
+        if (item):
+            return numTrue
+
+        return self._width * self._height - numTrue
+
+    def deepCopy(self):
+        return self.copy()
+
+    def get(self, x, y):
+        """
+        Get the value at (x, y) without going through a column.
+        """
+
+        return ((self._bits >> (x * self._height + y)) & 1) == 1
+
+    def getCellIndexes(self, key = True):
+        """
+        Get the index (x * height + y) of every cell that has the given value, in order.
+        """
+
+        bits = self._bits
+        if (not key):
+            bits = ~bits & ((1 << (self._width * self._height)) - 1)
+
+        indexes = []
+        while (bits):
+            lowBit = bits & -bits
+            indexes.append(lowBit.bit_length() - 1)
+            bits ^= lowBit
+
+        return indexes
+
+    def getHeight(self):
+        return self._height
+
+    def getWidth(self):
+        return self._width
+
+    def keepColumns(self, startX, endX):
+        """
+        Get a copy that only keeps the true cells with startX <= x < endX.
+        Since columns are contiguous in the bits, this is just a mask.
+        """
+
+        mask = (1 << (endX * self._height)) - (1 << (startX * self._height))
+
+        grid = BitGrid(self._width, self._height)
+        grid._bits = self._bits & mask
+
+        return grid
+
+    def set(self, x, y, value):
+        """
+        Set the value at (x, y) without going through a column.
+        """
+
+        if (not isinstance(value, bool)):
+            raise ValueError('Grids can only contain booleans')
+
+        mask = 1 << (x * self._height + y)
+        if (value):
+            self._bits |= mask
+        else:
+            self._bits &= ~mask
+
+        self._hash = None
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def view(self):
+        """
+        Get a read-only view of this grid.
+        The view shares its storage with this grid, so it is O(1) to create.
+        """
+
+        return FrozenBitGrid(self)
+
+    def toBytes(self):
+        """
+        Get the cells packed into bytes, one bit per cell (little-endian).
+        """
+
+        return self._bits.to_bytes(BitGrid.getNumBytes(self._width, self._height), 'little')
+
+    def toGrid(self):
+        """
+        Get a list-backed `Grid` with the same contents.
+        """
+
+        grid = Grid(self._width, self._height)
+        for (x, y) in self.asList():
+            grid[x][y] = True
+
+        return grid
+
+    def _cellIndexToPosition(self, index):
+        return divmod(index, self._height)
+
+    def __eq__(self, other):
+        if (other is None):
+            return False
+
+        if (isinstance(other, Grid)):
+            other = BitGrid.fromGrid(other)
+
+        return (self._width == other._width
+                and self._height == other._height
+                and self._bits == other._bits)
+
+    def __getitem__(self, x):
+        if (x < 0):
+            x += self._width
+
+        if (x < 0 or x >= self._width):
+            raise IndexError('Grid column out of range: %d' % (x))
+
+        return _BitGridColumn(self, x)
+
+    def __hash__(self):
+        if (self._hash is None):
+            self._hash = hash(self._bits)
+
+        return self._hash
+
+    def __lt__(self, other):
+        return self.__hash__() < other.__hash__()
+
+    def __setitem__(self, x, column):
+        for y in range(self._height):
+            self.set(x, y, column[y])
+
+    def __str__(self):
+        out = [[str(self.get(x, y))[0] for x in range(self._width)] for y in range(self._height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+class FrozenBitGrid(BitGrid):
+    """
+    A read-only `BitGrid`.
+    It shares storage with the grid it was made from, and raises a TypeError on any write.
+    Copies of a frozen grid are normal (writable) `BitGrid`s.
+    """
+
+    def __init__(self, grid):
+        self._width = grid._width
+        self._height = grid._height
+        self._bits = grid._bits
+        self._hash = grid._hash
+
+    # Override
+    def set(self, x, y, value):
+        raise TypeError('Read-only grids can not be modified.')
+
+    # Override
+    def view(self):
+        return self
+
+    # Override
+    def __setitem__(self, x, column):
+        raise TypeError('Read-only grids can not be modified.')
+
+class _BitGridColumn:
+    """
+    A lightweight proxy for a single column of a `BitGrid`.
+    This lets the familiar grid[x][y] syntax read and write the underlying bits.
+    """
+
+    __slots__ = ('_grid', '_x')
+
+    def __init__(self, grid, x):
+        self._grid = grid
+        self._x = x
+
+    def __getitem__(self, y):
+        height = self._grid._height
+        if (y < 0):
+            y += height
+
+        if (y < 0 or y >= height):
+            raise IndexError('Grid row out of range: %d' % (y))
+
+        return ((self._grid._bits >> (self._x * height + y)) & 1) == 1
+
+    def __iter__(self):
+        for y in range(self._grid._height):
+            yield self[y]
+
+    def __len__(self):
+        return self._grid._height
+
+    def __setitem__(self, y, value):
+        height = self._grid._height
+        if (y < 0):
+            y += height
+
+        if (y < 0 or y >= height):
+            raise IndexError('Grid row out of range: %d' % (y))
+
+        self._grid.set(self._x, y, value)
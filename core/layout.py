@@ -1,7 +1,12 @@
+import hashlib
 import os
 import random
+import weakref
 
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
+from pacai.core.grid import BitGrid
 from pacai.core.grid import Grid
 
 # By default, the layout directory is adjacent to this file.
@@ -9,6 +14,13 @@ DEFAULT_LAYOUT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '
 
 GHOST_NUMS = ['1', '2', '3', '4']
 
+# The number of bytes in a layout's content hash.
+CONTENT_HASH_SIZE = 8
+
+# Every live layout, so serialized states can find their layout again.
+# {content hash: layout, ...}
+_layoutsByHash = weakref.WeakValueDictionary()
+
 class Layout(object):
     """
     A Layout manages the static information about the game board.
@@ -18,17 +30,69 @@ class Layout(object):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, initialValue = False)
-        self.food = Grid(self.width, self.height, initialValue = False)
+        self.food = BitGrid(self.width, self.height, initialValue = False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.layoutText = layoutText
 
+        # Legal actions and neighbors for every open position.
+        # These are built on first use and shared by every state on this layout.
+        self._actionTable = None
+        self._neighborTable = None
+
         self.processLayoutText(layoutText, maxGhosts)
 
+        self._contentHash = self._computeContentHash()
+        _layoutsByHash[self._contentHash] = self
+
+    def getContentHash(self):
+        """
+        Get a short (bytes) hash of the board and the agents that are actually on it.
+        Unlike the normal hash, this is stable across processes.
+        """
+
+        return self._contentHash
+
+    def getLegalNeighbors(self, position):
+        """
+        Get the same neighbors as `pacai.core.actions.Actions.getLegalNeighbors` on this layout,
+        but look them up in a table built once for the layout.
+        The caller owns the returned list.
+        """
+
+        if (self._neighborTable is None):
+            self._buildActionTables()
+
+        x, y = position
+        neighbors = self._neighborTable.get((int(x + 0.5), int(y + 0.5)))
+        if (neighbors is None):
+            return Actions.getLegalNeighbors(position, self.walls)
+
+        return list(neighbors)
+
     def getNumGhosts(self):
         return self.numGhosts
 
+    def getPossibleActions(self, position, direction):
+        """
+        Get the same actions as `pacai.core.actions.Actions.getPossibleActions` on this layout.
+        Actions for grid points are looked up in a table built once for the layout,
+        agents between grid points (like half-speed scared ghosts) fall back to
+        `pacai.core.actions.Actions.getPossibleActions`.
+
+        The returned tuple is shared, callers that need to modify it should make a list.
+        """
+
+        if (self._actionTable is None):
+            self._buildActionTables()
+
+        actions = self._actionTable.get(position)
+        if (actions is None):
+            return tuple(Actions.getPossibleActions(position, direction, self.walls))
+
+        return actions
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -102,6 +166,48 @@ class Layout(object):
         self.agentPositions.sort()
         self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
 
+    def _buildActionTables(self):
+        actionTable = {}
+        neighborTable = {}
+
+        for position in self.walls.asList(False):
+            try:
+                actions = Actions.getPossibleActions(position, Directions.STOP, self.walls)
+                neighbors = Actions.getLegalNeighbors(position, self.walls)
+            except IndexError:
+                # Positions on the edge of an open board are left to the slow path.
+                continue
+
+            actionTable[position] = tuple(actions)
+            neighborTable[position] = tuple(neighbors)
+
+        self._actionTable = actionTable
+        self._neighborTable = neighborTable
+
+    def _computeContentHash(self):
+        content = '\n'.join(self.layoutText) + '\n' + repr(self.agentPositions)
+        return hashlib.blake2b(content.encode(), digest_size = CONTENT_HASH_SIZE).digest()
+
+    def __getstate__(self):
+        # Don't pickle the tables, they are cheap to rebuild.
+        state = self.__dict__.copy()
+        state['_actionTable'] = None
+        state['_neighborTable'] = None
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        # Layouts pickled before the tables and content hashes existed.
+        self._actionTable = None
+        self._neighborTable = None
+
+        if (state.get('_contentHash') is None):
+            self._contentHash = self._computeContentHash()
+
+        _layoutsByHash[self._contentHash] = self
+
     def processLayoutChar(self, x, y, layoutChar, maxGhosts):
         if (layoutChar == '%'):
             self.walls[x][y] = True
@@ -118,6 +224,13 @@ class Layout(object):
             self.agentPositions.append((int(layoutChar), (x, y)))
             self.numGhosts += 1
 
+def getLayoutByContentHash(contentHash):
+    """
+    Get a live layout with the given content hash, or None if there is no such layout.
+    """
+
+    return _layoutsByHash.get(contentHash)
+
 def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
     if (not name.endswith('.lay')):
         name += '.lay'
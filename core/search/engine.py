@@ -0,0 +1,740 @@
+"""
+Framework-level graph search algorithms that work on any `pacai.core.search.problem.SearchProblem`.
+
+Unlike the student search functions, these keep their closed lists in hash sets,
+rebuild the path from parent pointers instead of copying it into every node,
+and do not keep duplicate states in the open list.
+All the functions return a list of actions (or an empty list if no goal can be reached),
+and fill in the problem's `pacai.core.search.stats.SearchStats`.
+
+`pacai.agents.search.base.SearchAgent` can select these functions by their short names,
+e.g. `--agent-args fn=astar,heuristic=manhattan`.
+"""
+
+import collections
+import itertools
+import math
+import time
+
+from pacai.core.search.heuristic import null as nullHeuristic
+from pacai.util.priorityQueue import IndexedPriorityQueue
+
+# Tie-breaking policies for nodes with the same priority.
+# First in, first out.
+TIE_BREAK_FIFO = 'fifo'
+# Last in, first out.
+TIE_BREAK_LIFO = 'lifo'
+# The node with the largest path cost (the one closest to a goal by the heuristic),
+# then last in, first out.
+TIE_BREAK_DEEPEST = 'deepest'
+
+TIE_BREAKING_POLICIES = [TIE_BREAK_FIFO, TIE_BREAK_LIFO, TIE_BREAK_DEEPEST]
+DEFAULT_TIE_BREAKING = TIE_BREAK_DEEPEST
+
+DEFAULT_WEIGHT = 2.0
+
+# Anytime A* starts with this weight and lowers it by the step after every search.
+DEFAULT_ANYTIME_WEIGHT = 3.0
+DEFAULT_ANYTIME_WEIGHT_STEP = 0.5
+# Seconds.
+DEFAULT_TIME_BUDGET = 1.0
+
+class AnytimeSearch(object):
+    """
+    Anytime repairing A* (ARA*): a series of weighted A* searches with a shrinking weight,
+    where each search reuses the work of the previous ones
+    (only states that got a cheaper path are searched again).
+
+    `AnytimeSearch.improve` runs the searches until a time budget runs out,
+    and can be called again to keep improving the path.
+    After each search the path costs at most `AnytimeSearch.getBound` times the optimal cost
+    (for admissible heuristics), and the bound reaches 1 once the path is optimal.
+    The bound is also put in the problem's stats (`SearchStats.suboptimalityBound`).
+    """
+
+    def __init__(self, problem, heuristic = nullHeuristic, initialWeight = DEFAULT_ANYTIME_WEIGHT,
+            weightStep = DEFAULT_ANYTIME_WEIGHT_STEP):
+        if (initialWeight < 1.0):
+            raise ValueError('The initial weight for anytime A* must be at least 1, found: %s.' %
+                    (initialWeight))
+
+        if (weightStep <= 0.0):
+            raise ValueError('The weight step for anytime A* must be positive, found: %s.' %
+                    (weightStep))
+
+        self._problem = problem
+        self._weight = initialWeight
+        self._weightStep = weightStep
+
+        self._stats = problem.getStats()
+        self._successorStates = self._stats.timeSuccessors(problem.successorStates)
+        self._heuristic = self._stats.timeHeuristic(heuristic)
+
+        start = problem.startingState()
+
+        # The cheapest known node for each state.
+        self._nodes = {start: _Node(start)}
+        # {state: heuristic, ...}
+        self._estimates = {}
+
+        self._fringe = IndexedPriorityQueue()
+        self._closed = set()
+        # Closed states that got a cheaper path, they are opened by the next search.
+        self._inconsistent = set()
+        self._counter = itertools.count(0, -1)
+
+        # The goal node of the best path.
+        self._goal = None
+        self._bound = math.inf
+        self._searchDone = False
+
+        self._push(start)
+
+    def getActions(self):
+        """
+        Get the best path found so far,
+        or an empty list if no path has been found.
+        """
+
+        if (self._goal is None):
+            return []
+
+        return self._goal.getPath()
+
+    def getBound(self):
+        """
+        Get how many times the optimal cost the best path may cost at most,
+        or infinity if no path has been found.
+        """
+
+        return self._bound
+
+    def getWeight(self):
+        return self._weight
+
+    def improve(self, timeBudget = None):
+        """
+        Keep searching for better paths until the time budget (in seconds) runs out,
+        the path is optimal, or there is no path.
+        Without a budget, the searches run until the path is optimal.
+        The first path is always found, no matter the budget.
+        Returns the best path found so far (see `AnytimeSearch.getActions`).
+        """
+
+        deadline = None
+        if (timeBudget is not None):
+            deadline = time.perf_counter() + timeBudget
+
+        with self._stats.timeSearch():
+            while (not self.isDone()):
+                if (self._searchDone):
+                    if (deadline is not None and time.perf_counter() >= deadline):
+                        break
+
+                    self._nextSearch()
+
+                if (not self._improvePath(deadline)):
+                    break
+
+                self._searchDone = True
+                self._updateBound()
+
+        return self.getActions()
+
+    def isDone(self):
+        """
+        Check if no better path can be found:
+        the path is optimal, or there is no path at all.
+        """
+
+        if (not self._searchDone):
+            return False
+
+        return (self._goal is None or self._bound <= 1.0 or self._weight <= 1.0)
+
+    def _estimate(self, state):
+        estimate = self._estimates.get(state)
+        if (estimate is None):
+            estimate = self._heuristic(state, self._problem)
+            self._estimates[state] = estimate
+
+        return estimate
+
+    def _improvePath(self, deadline):
+        """
+        Run the current weighted search until no open state can lead to a better path.
+        Returns False if the deadline passed first.
+        """
+
+        while (not self._fringe.isEmpty()):
+            state, priority = self._fringe.peekWithPriority()
+            if (self._goal is not None and priority[0] >= self._goal.cost):
+                return True
+
+            # Only stop early once there is a path to fall back on.
+            if (deadline is not None and self._goal is not None
+                    and time.perf_counter() >= deadline):
+                return False
+
+            self._fringe.pop()
+            node = self._nodes[state]
+
+            # Goals are left open, so a cheaper path to them is searched right away.
+            if (self._problem.isGoal(state)):
+                if (self._goal is None or node.cost < self._goal.cost):
+                    self._goal = node
+
+                continue
+
+            self._closed.add(state)
+
+            for (child, action, cost) in self._successorStates(state):
+                childCost = node.cost + cost
+
+                bestNode = self._nodes.get(child)
+                if (bestNode is not None and childCost >= bestNode.cost):
+                    self._stats.duplicatesPruned += 1
+                    continue
+
+                self._nodes[child] = _Node(child, action, node, childCost)
+
+                if (child in self._closed):
+                    self._inconsistent.add(child)
+                else:
+                    self._push(child)
+
+            self._stats.updatePeaks(len(self._fringe) + len(self._inconsistent),
+                    len(self._closed))
+
+        return True
+
+    def _nextSearch(self):
+        """
+        Lower the weight and open the states of the next search.
+        """
+
+        self._weight = max(1.0, self._weight - self._weightStep)
+
+        states = [state for (state, priority) in self._fringe.items()]
+        states.extend(self._inconsistent)
+
+        self._fringe = IndexedPriorityQueue()
+        self._closed = set()
+        self._inconsistent = set()
+        self._searchDone = False
+
+        for state in states:
+            self._push(state)
+
+    def _push(self, state):
+        cost = self._nodes[state].cost
+        priority = cost + self._weight * self._estimate(state)
+        self._fringe.push(state, (priority, -cost, next(self._counter)))
+
+    def _updateBound(self):
+        if (self._goal is None):
+            return
+
+        # Every path that is not found yet goes through an open state.
+        lowerBound = self._goal.cost
+        for state in itertools.chain((state for (state, priority) in self._fringe.items()),
+                self._inconsistent):
+            lowerBound = min(lowerBound, self._nodes[state].cost + self._estimate(state))
+
+        if (lowerBound <= 0):
+            bound = 1.0
+            if (self._goal.cost > 0):
+                bound = self._weight
+        else:
+            bound = min(self._weight, self._goal.cost / lowerBound)
+
+        self._bound = min(self._bound, bound)
+        self._stats.suboptimalityBound = self._bound
+
+class _Node(object):
+    """
+    A search node.
+    The path to a node is rebuilt by following the parents back to the start.
+    """
+
+    __slots__ = ('state', 'action', 'parent', 'cost')
+
+    def __init__(self, state, action = None, parent = None, cost = 0):
+        self.state = state
+        self.action = action
+        self.parent = parent
+        self.cost = cost
+
+    def getPath(self):
+        actions = []
+
+        node = self
+        while (node.parent is not None):
+            actions.append(node.action)
+            node = node.parent
+
+        actions.reverse()
+        return actions
+
+class _Frontier(object):
+    """
+    One direction of a bidirectional A*.
+    The cheapest known path to each state is kept as parent pointers.
+    """
+
+    def __init__(self, problem, otherProblem, heuristic, stats):
+        self._problem = problem
+        self._otherProblem = otherProblem
+        self._heuristic = heuristic
+
+        self._stats = stats
+        self._successorStates = stats.timeSuccessors(problem.successorStates)
+
+        start = problem.startingState()
+
+        # {state: cost, ...}
+        self.costs = {start: 0}
+        # {state: (parent state, action that connects the parent and the state), ...}
+        self._parents = {start: None}
+
+        self._fringe = IndexedPriorityQueue()
+        self._counter = itertools.count(0, -1)
+
+        self._push(start)
+
+    def expand(self):
+        """
+        Expand the open state with the lowest priority.
+        Returns the states that got a cheaper path: [state, ...].
+        """
+
+        state = self._fringe.pop()
+        improved = []
+        cost = self.costs[state]
+
+        for (child, action, stepCost) in self._successorStates(state):
+            childCost = cost + stepCost
+
+            bestCost = self.costs.get(child)
+            if (bestCost is not None and childCost >= bestCost):
+                self._stats.duplicatesPruned += 1
+                continue
+
+            self.costs[child] = childCost
+            self._parents[child] = (state, action)
+            self._push(child)
+
+            improved.append(child)
+
+        return improved
+
+    def getActions(self, state):
+        """
+        Get the actions that connect the state and the start of this direction,
+        ordered from the state back to the start.
+        """
+
+        actions = []
+
+        while (self._parents[state] is not None):
+            state, action = self._parents[state]
+            actions.append(action)
+
+        return actions
+
+    def getMinPriority(self):
+        return self._fringe.peekWithPriority()[1][0]
+
+    def getNumClosed(self):
+        return len(self.costs) - len(self._fringe)
+
+    def isEmpty(self):
+        return self._fringe.isEmpty()
+
+    def _push(self, state):
+        cost = self.costs[state]
+        potential = (self._heuristic(state, self._problem)
+                - self._heuristic(state, self._otherProblem)) / 2
+        self._fringe.push(state, (cost + potential, -cost, next(self._counter)))
+
+    def __len__(self):
+        return len(self._fringe)
+
+class _ReversedProblem(object):
+    """
+    A view of a search problem for searching backwards from its goal.
+    The start and goal are swapped and the successors are the reverse successors,
+    everything else is read from the original problem.
+    """
+
+    def __init__(self, problem):
+        self._problem = problem
+        self.goal = problem.startingState()
+
+    def getGoalState(self):
+        return self.goal
+
+    def isGoal(self, state):
+        return state == self.goal
+
+    def startingState(self):
+        return self._problem.getGoalState()
+
+    def successorStates(self, state):
+        return self._problem.reverseSuccessorStates(state)
+
+    def __getattr__(self, name):
+        return getattr(self._problem, name)
+
+def anytimeAStarSearch(problem, heuristic = nullHeuristic, timeBudget = DEFAULT_TIME_BUDGET,
+        initialWeight = DEFAULT_ANYTIME_WEIGHT, weightStep = DEFAULT_ANYTIME_WEIGHT_STEP):
+    """
+    Find the best path that anytime A* (see `AnytimeSearch`) can find
+    within the time budget (in seconds, None for no limit).
+    The first path is always found, even if that takes longer than the budget.
+    The bound that the path reached is in the problem's stats
+    (`pacai.core.search.stats.SearchStats.suboptimalityBound`).
+    """
+
+    return AnytimeSearch(problem, heuristic, initialWeight, weightStep).improve(timeBudget)
+
+def aStarSearch(problem, heuristic = nullHeuristic, tieBreaking = DEFAULT_TIE_BREAKING):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+    The path is optimal for admissible heuristics
+    (closed states are reopened if a cheaper path to them is found).
+    """
+
+    return _bestFirstSearch(problem, heuristic, 1.0, tieBreaking, True)
+
+def bidirectionalAStarSearch(problem, heuristic = nullHeuristic):
+    """
+    A* from the start and from the goal at the same time,
+    always growing the search with the smaller open list.
+
+    The heuristic is used front-to-end, as an estimate from a state to either end.
+    Estimates toward the start come from calling it with a view of the problem
+    that has the start and goal swapped,
+    so heuristics like `pacai.core.search.heuristic.manhattan` work in both directions.
+    Both directions are ordered by the average of the two estimates
+    (forwards: g + (toGoal - toStart) / 2, backwards: g + (toStart - toGoal) / 2),
+    so the search can stop as soon as the lowest priorities of both directions add up
+    to the cost of the best path found.
+
+    The path is optimal for consistent heuristics.
+    The problem needs a goal state (`pacai.core.search.problem.SearchProblem.getGoalState`)
+    and reverse successors (`pacai.core.search.problem.SearchProblem.reverseSuccessorStates`).
+    """
+
+    start = _getBidirectionalStart(problem)
+
+    stats = problem.getStats()
+    heuristic = stats.timeHeuristic(heuristic)
+
+    with stats.timeSearch():
+        if (problem.isGoal(start)):
+            return []
+
+        reversedProblem = _ReversedProblem(problem)
+
+        forward = _Frontier(problem, reversedProblem, heuristic, stats)
+        backward = _Frontier(reversedProblem, problem, heuristic, stats)
+
+        bestCost = float('inf')
+        meeting = None
+
+        while (not forward.isEmpty() and not backward.isEmpty()):
+            # Every path that is not found yet costs at least as much as both lowest priorities.
+            if (bestCost <= forward.getMinPriority() + backward.getMinPriority()):
+                break
+
+            frontier, other = forward, backward
+            if (len(backward) < len(forward)):
+                frontier, other = backward, forward
+
+            for state in frontier.expand():
+                otherCost = other.costs.get(state)
+                if (otherCost is not None and frontier.costs[state] + otherCost < bestCost):
+                    bestCost = frontier.costs[state] + otherCost
+                    meeting = state
+
+            stats.updatePeaks(len(forward) + len(backward),
+                    forward.getNumClosed() + backward.getNumClosed())
+
+        if (meeting is None):
+            return []
+
+        return list(reversed(forward.getActions(meeting))) + backward.getActions(meeting)
+
+def bidirectionalBreadthFirstSearch(problem):
+    """
+    BFS from the start and from the goal at the same time,
+    one whole layer at a time from the side with the smaller layer.
+    Finds the path with the fewest actions.
+
+    The problem needs a goal state (`pacai.core.search.problem.SearchProblem.getGoalState`)
+    and reverse successors (`pacai.core.search.problem.SearchProblem.reverseSuccessorStates`).
+    """
+
+    start = _getBidirectionalStart(problem)
+    goal = problem.getGoalState()
+
+    stats = problem.getStats()
+    successorStates = stats.timeSuccessors(problem.successorStates)
+    reverseSuccessorStates = stats.timeSuccessors(problem.reverseSuccessorStates)
+
+    with stats.timeSearch():
+        if (problem.isGoal(start)):
+            return []
+
+        # {state: (depth, next state toward the search's start, action), ...}
+        forwardSeen = {start: (0, None, None)}
+        backwardSeen = {goal: (0, None, None)}
+
+        forwardLayer = [start]
+        backwardLayer = [goal]
+
+        while (len(forwardLayer) > 0 and len(backwardLayer) > 0):
+            if (len(forwardLayer) <= len(backwardLayer)):
+                forwardLayer, meeting = _expandLayer(forwardLayer, forwardSeen, backwardSeen,
+                        successorStates, stats)
+            else:
+                backwardLayer, meeting = _expandLayer(backwardLayer, backwardSeen, forwardSeen,
+                        reverseSuccessorStates, stats)
+
+            stats.updatePeaks(len(forwardLayer) + len(backwardLayer),
+                    len(forwardSeen) + len(backwardSeen))
+
+            if (meeting is None):
+                continue
+
+            actions = []
+
+            state = meeting
+            while (forwardSeen[state][1] is not None):
+                _, state, action = forwardSeen[state]
+                actions.append(action)
+
+            actions.reverse()
+
+            state = meeting
+            while (backwardSeen[state][1] is not None):
+                _, state, action = backwardSeen[state]
+                actions.append(action)
+
+            return actions
+
+        return []
+
+def breadthFirstSearch(problem):
+    """
+    Search the shallowest nodes first.
+    Finds the path with the fewest actions.
+    States are tested as goals when they are generated,
+    and every state is put in the open list at most once.
+    """
+
+    stats = problem.getStats()
+    successorStates = stats.timeSuccessors(problem.successorStates)
+
+    with stats.timeSearch():
+        start = problem.startingState()
+        if (problem.isGoal(start)):
+            return []
+
+        seen = {start}
+        fringe = collections.deque([_Node(start)])
+
+        while (len(fringe) > 0):
+            node = fringe.popleft()
+
+            for (state, action, cost) in successorStates(node.state):
+                if (state in seen):
+                    stats.duplicatesPruned += 1
+                    continue
+
+                child = _Node(state, action, node)
+                if (problem.isGoal(state)):
+                    return child.getPath()
+
+                seen.add(state)
+                fringe.append(child)
+
+            stats.updatePeaks(len(fringe), len(seen))
+
+        return []
+
+def depthFirstSearch(problem):
+    """
+    Search the deepest nodes first.
+    States that are already closed are never pushed again,
+    and stale copies of a state are dropped when they are popped.
+    """
+
+    stats = problem.getStats()
+    successorStates = stats.timeSuccessors(problem.successorStates)
+
+    with stats.timeSearch():
+        closed = set()
+        fringe = [_Node(problem.startingState())]
+
+        while (len(fringe) > 0):
+            node = fringe.pop()
+            if (node.state in closed):
+                stats.duplicatesPruned += 1
+                continue
+
+            if (problem.isGoal(node.state)):
+                return node.getPath()
+
+            closed.add(node.state)
+
+            for (state, action, cost) in successorStates(node.state):
+                if (state in closed):
+                    stats.duplicatesPruned += 1
+                else:
+                    fringe.append(_Node(state, action, node))
+
+            stats.updatePeaks(len(fringe), len(closed))
+
+        return []
+
+def uniformCostSearch(problem, tieBreaking = DEFAULT_TIE_BREAKING):
+    """
+    Search the node of least total cost first.
+    """
+
+    return _bestFirstSearch(problem, nullHeuristic, 1.0, tieBreaking, False)
+
+def weightedAStarSearch(problem, heuristic = nullHeuristic, weight = DEFAULT_WEIGHT,
+        tieBreaking = DEFAULT_TIE_BREAKING):
+    """
+    A* with the heuristic scaled by weight (f = g + weight * h).
+    Usually expands far fewer nodes than A*,
+    and the path costs at most weight times the optimal cost for admissible heuristics.
+    Closed states are not reopened.
+    """
+
+    if (weight < 1.0):
+        raise ValueError('The weight for weighted A* must be at least 1, found: %s.' % (weight))
+
+    return _bestFirstSearch(problem, heuristic, weight, tieBreaking, False)
+
+def _bestFirstSearch(problem, heuristic, weight, tieBreaking, reopen):
+    """
+    A* (with a weighted heuristic), ordered by g + weight * h.
+
+    The open list is a `pacai.util.priorityQueue.IndexedPriorityQueue` of states,
+    so each state is in it at most once:
+    a cheaper path to an open state lowers its priority instead of adding a duplicate,
+    and a path that is not cheaper than the best known one is dropped.
+    """
+
+    if (tieBreaking not in TIE_BREAKING_POLICIES):
+        raise ValueError('Unknown tie-breaking policy: %s. Expected one of: %s.' %
+                (tieBreaking, TIE_BREAKING_POLICIES))
+
+    if (tieBreaking == TIE_BREAK_FIFO):
+        counter = itertools.count()
+    else:
+        counter = itertools.count(0, -1)
+
+    stats = problem.getStats()
+    successorStates = stats.timeSuccessors(problem.successorStates)
+    heuristic = stats.timeHeuristic(heuristic)
+
+    def push(node):
+        priority = node.cost + weight * heuristic(node.state, problem)
+
+        if (tieBreaking == TIE_BREAK_DEEPEST):
+            fringe.push(node.state, (priority, -node.cost, next(counter)))
+        else:
+            fringe.push(node.state, (priority, next(counter)))
+
+    with stats.timeSearch():
+        start = problem.startingState()
+        fringe = IndexedPriorityQueue()
+        closed = set()
+
+        # The cheapest known node for each state.
+        nodes = {start: _Node(start)}
+        push(nodes[start])
+
+        while (not fringe.isEmpty()):
+            node = nodes[fringe.pop()]
+
+            if (problem.isGoal(node.state)):
+                return node.getPath()
+
+            closed.add(node.state)
+
+            for (state, action, cost) in successorStates(node.state):
+                childCost = node.cost + cost
+
+                bestNode = nodes.get(state)
+                if (bestNode is not None and childCost >= bestNode.cost):
+                    stats.duplicatesPruned += 1
+                    continue
+
+                if (state in closed):
+                    if (not reopen):
+                        stats.duplicatesPruned += 1
+                        continue
+
+                    closed.remove(state)
+
+                child = _Node(state, action, node, childCost)
+                nodes[state] = child
+                push(child)
+
+            stats.updatePeaks(len(fringe), len(closed))
+
+        return []
+
+def _expandLayer(layer, seen, otherSeen, successorFunction, stats):
+    """
+    Expand a whole BFS layer of one direction of a bidirectional BFS.
+    Returns the next layer, and the state where the cheapest path through this layer
+    meets the other direction (or None).
+    """
+
+    nextLayer = []
+    meeting = None
+    bestDepth = None
+
+    for state in layer:
+        depth = seen[state][0] + 1
+
+        for (child, action, cost) in successorFunction(state):
+            if (child in seen):
+                stats.duplicatesPruned += 1
+                continue
+
+            seen[child] = (depth, state, action)
+            nextLayer.append(child)
+
+            if (child in otherSeen):
+                totalDepth = depth + otherSeen[child][0]
+                if (bestDepth is None or totalDepth < bestDepth):
+                    bestDepth = totalDepth
+                    meeting = child
+
+    return nextLayer, meeting
+
+def _getBidirectionalStart(problem):
+    if (problem.getGoalState() is None):
+        raise ValueError('Bidirectional search needs a problem with a single goal state' +
+                ' (see SearchProblem.getGoalState): %s.' % (type(problem).__name__))
+
+    return problem.startingState()
+
+# Abbreviations
+
+anytime = anytimeAStarSearch
+astar = aStarSearch
+bfs = breadthFirstSearch
+biastar = bidirectionalAStarSearch
+bibfs = bidirectionalBreadthFirstSearch
+dfs = depthFirstSearch
+ucs = uniformCostSearch
+wastar = weightedAStarSearch
@@ -1,5 +1,6 @@
 from pacai.core.actions import Actions
 from pacai.core.directions import Directions
+from pacai.core.grid import BitGrid
 from pacai.core.search.problem import SearchProblem
 
 class FoodSearchProblem(SearchProblem):
@@ -16,11 +17,35 @@ class FoodSearchProblem(SearchProblem):
     def __init__(self, startingGameState):
         super().__init__()
 
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFoodView())
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
         self.heuristicInfo = {}  # A dictionary for the heuristic to store information
 
+    def getFoodGrid(self, state):
+        """
+        Get the remaining food of a state as a grid.
+        """
+
+        return state[1]
+
+    def getFoodPositions(self, state):
+        """
+        Get the positions of the remaining food of a state.
+        """
+
+        return state[1].asList()
+
+    def getNumFood(self, state):
+        return state[1].count()
+
+    def getPosition(self, state):
+        """
+        Get Pacman's (x, y) position in a state.
+        """
+
+        return state[0]
+
     def startingState(self):
         return self.start
 
@@ -51,7 +76,7 @@ class FoodSearchProblem(SearchProblem):
         If those actions include an illegal move, return 999999.
         """
 
-        x, y = self.startingState()[0]
+        x, y = self.getPosition(self.startingState())
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -62,3 +87,101 @@ class FoodSearchProblem(SearchProblem):
             cost += 1
 
         return cost
+
+class CompactFoodSearchProblem(FoodSearchProblem):
+    """
+    A `FoodSearchProblem` with small integer states.
+
+    A search state in this problem is a tuple (packedPosition, foodMask).
+    The packedPosition is Pacman's position packed into one integer (x * height + y),
+    and foodMask has bit i set if the i-th food of the starting state
+    (in the order of `CompactFoodSearchProblem.getAllFood`) is still there.
+    States are cheap to copy, hash, and compare.
+
+    Heuristics that expect a food grid can get one from `FoodSearchProblem.getFoodGrid`,
+    and Pacman's position from `FoodSearchProblem.getPosition`.
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__(startingGameState)
+
+        self._height = self.walls.getHeight()
+
+        food = startingGameState.getFoodView()
+        self._foodPositions = food.asList()
+        foodMasks = {self.packPosition(position): (1 << index)
+                for (index, position) in enumerate(self._foodPositions)}
+
+        # {packedPosition: [(packed next position, direction, mask to clear its food), ...], ...}
+        self._moves = {}
+        for (x, y) in self.walls.asList(False):
+            moves = []
+            for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(direction)
+                nextx, nexty = int(x + dx), int(y + dy)
+                if (not self.walls[nextx][nexty]):
+                    nextPosition = self.packPosition((nextx, nexty))
+                    moves.append((nextPosition, direction, ~foodMasks.get(nextPosition, 0)))
+
+            self._moves[self.packPosition((x, y))] = moves
+
+        position = self.packPosition(startingGameState.getPacmanPosition())
+        self.start = (position, (1 << len(self._foodPositions)) - 1)
+
+    def getAllFood(self):
+        """
+        Get the positions of all the food in the starting state.
+        Bit i of a food mask is the food at index i.
+        """
+
+        return self._foodPositions
+
+    def getFoodGrid(self, state):
+        grid = BitGrid(self.walls.getWidth(), self._height)
+        for (x, y) in self.getFoodPositions(state):
+            grid[x][y] = True
+
+        return grid
+
+    def getFoodPositions(self, state):
+        return [self._foodPositions[index] for index in getMaskIndexes(state[1])]
+
+    def getNumFood(self, state):
+        return bin(state[1]).count('1')
+
+    def getPosition(self, state):
+        return self.unpackPosition(state[0])
+
+    def isGoal(self, state):
+        return state[1] == 0
+
+    def packPosition(self, position):
+        return position[0] * self._height + position[1]
+
+    def successorStates(self, state):
+        """
+        Returns successor states, the actions they require, and a cost of 1.
+        """
+
+        self._numExpanded += 1
+
+        foodMask = state[1]
+        return [((nextPosition, foodMask & clearMask), direction, 1)
+                for (nextPosition, direction, clearMask) in self._moves[state[0]]]
+
+    def unpackPosition(self, packedPosition):
+        return divmod(packedPosition, self._height)
+
+
+def getMaskIndexes(mask):
+    """
+    Get the index of every set bit in a food mask, in order.
+    """
+
+    indexes = []
+    while (mask):
+        lowBit = mask & -mask
+        indexes.append(lowBit.bit_length() - 1)
+        mask ^= lowBit
+
+    return indexes
@@ -4,6 +4,87 @@ goal in the provided `pacai.core.search.problem.SearchProblem`.
 """
 
 from pacai.core import distance
+from pacai.core.search.food import getMaskIndexes
+
+# Keys of the shared values in `problem.heuristicInfo`.
+FOOD_DISTANCES_KEY = 'foodDistances'
+MST_KEY = 'mstWeights'
+FARTHEST_PAIR_KEY = 'farthestPairs'
+
+class FoodDistances(object):
+    """
+    Maze distances for food search problems, computed once per problem:
+    between every pair of food (of the starting state),
+    and between every food and every open cell.
+
+    Food is identified by its index in the starting state's food list,
+    and sets of food by bitmasks over those indexes
+    (the same masks as the states of `pacai.core.search.food.CompactFoodSearchProblem`).
+    Food that can not be reached counts as 0 away, so bounds stay admissible.
+    """
+
+    def __init__(self, walls, foodPositions):
+        self._oracle = distance.getMazeOracle(walls)
+        self._foodPositions = list(foodPositions)
+        self._foodIndexes = {position: index for (index, position) in enumerate(foodPositions)}
+
+        # [[distance to every open cell], ...], one per food.
+        self._cellDistances = []
+        for position in self._foodPositions:
+            row = self._oracle.getDistancesFrom(position)
+            self._cellDistances.append([max(0, value) for value in row])
+
+        # [[distance to every food], ...], one per food.
+        self._foodDistances = []
+        for row in self._cellDistances:
+            self._foodDistances.append([row[self._oracle.getIndex(position)]
+                    for position in self._foodPositions])
+
+    def getDistance(self, foodIndex1, foodIndex2):
+        """
+        Get the maze distance between two food.
+        """
+
+        return self._foodDistances[foodIndex1][foodIndex2]
+
+    def getDistancesFrom(self, position, foodIndexes):
+        """
+        Get the maze distance from an open position to each of the given food.
+        """
+
+        cellIndex = self._oracle.getIndex(position)
+        return [self._cellDistances[foodIndex][cellIndex] for foodIndex in foodIndexes]
+
+    def getFoodPositions(self):
+        return self._foodPositions
+
+    def getMask(self, food):
+        """
+        Get the food mask for a food mask (returned as is) or a food grid.
+        """
+
+        if (isinstance(food, int)):
+            return food
+
+        mask = 0
+        for position in food.asList():
+            mask |= (1 << self._foodIndexes[position])
+
+        return mask
+
+def getFoodDistances(problem):
+    """
+    Get the `FoodDistances` of a `pacai.core.search.food.FoodSearchProblem`.
+    They are computed on the first call and shared through `problem.heuristicInfo`.
+    """
+
+    foodDistances = problem.heuristicInfo.get(FOOD_DISTANCES_KEY)
+    if (foodDistances is None):
+        foodPositions = problem.getFoodPositions(problem.startingState())
+        foodDistances = FoodDistances(problem.walls, foodPositions)
+        problem.heuristicInfo[FOOD_DISTANCES_KEY] = foodDistances
+
+    return foodDistances
 
 def null(state, problem = None):
     """
@@ -35,6 +116,85 @@ def euclidean(position, problem):
 def numFood(state, problem):
     """
     This heuristic is the amount of food left to on the board.
+    Food search problems count it for their own state encoding,
+    any other problem needs (position, foodGrid) states.
     """
 
+    if (hasattr(problem, 'getNumFood')):
+        return problem.getNumFood(state)
+
     return state[1].count()
+
+def farthestPair(state, problem):
+    """
+    A heuristic for food search problems.
+    Pacman has to reach both food of the farthest apart pair,
+    so it is the distance between them plus the distance to the closer one.
+    The farthest pair is memoized on the food mask in `problem.heuristicInfo`.
+    """
+
+    foodDistances = getFoodDistances(problem)
+    mask = foodDistances.getMask(state[1])
+    if (mask == 0):
+        return 0
+
+    pairs = problem.heuristicInfo.setdefault(FARTHEST_PAIR_KEY, {})
+
+    pair = pairs.get(mask)
+    if (pair is None):
+        indexes = getMaskIndexes(mask)
+        pair = (indexes[0], indexes[0])
+        pairDistance = 0
+
+        for i in range(len(indexes)):
+            for j in range(i + 1, len(indexes)):
+                value = foodDistances.getDistance(indexes[i], indexes[j])
+                if (value > pairDistance):
+                    pair = (indexes[i], indexes[j])
+                    pairDistance = value
+
+        pairs[mask] = pair
+
+    toPair = foodDistances.getDistancesFrom(problem.getPosition(state), pair)
+    return min(toPair) + foodDistances.getDistance(pair[0], pair[1])
+
+def mst(state, problem):
+    """
+    A heuristic for food search problems.
+    The distance to the closest food plus the weight of
+    the minimum spanning tree (by maze distance) of the remaining food.
+    The tree weight is memoized on the food mask in `problem.heuristicInfo`.
+    """
+
+    foodDistances = getFoodDistances(problem)
+    mask = foodDistances.getMask(state[1])
+    if (mask == 0):
+        return 0
+
+    indexes = getMaskIndexes(mask)
+    weights = problem.heuristicInfo.setdefault(MST_KEY, {})
+
+    weight = weights.get(mask)
+    if (weight is None):
+        weight = _mstWeight(foodDistances, indexes)
+        weights[mask] = weight
+
+    return min(foodDistances.getDistancesFrom(problem.getPosition(state), indexes)) + weight
+
+def _mstWeight(foodDistances, indexes):
+    """
+    Prim's algorithm on the complete graph of the food.
+    """
+
+    # {food index: distance to the tree, ...}
+    remaining = {index: foodDistances.getDistance(indexes[0], index) for index in indexes[1:]}
+    weight = 0
+
+    while (len(remaining) > 0):
+        closest = min(remaining, key = remaining.get)
+        weight += remaining.pop(closest)
+
+        for index in remaining:
+            remaining[index] = min(remaining[index], foodDistances.getDistance(closest, index))
+
+    return weight
@@ -34,6 +34,9 @@ class PositionSearchProblem(SearchProblem):
         if (self.startState is None):
             raise ValueError("Could not find starting location.")
 
+    def getGoalState(self):
+        return self.goal
+
     def startingState(self):
         return self.startState
 
@@ -43,11 +46,9 @@ class PositionSearchProblem(SearchProblem):
 
         # Register the locations we have visited.
         # This allows the GUI to highlight them.
-        self._visitedLocations.add(state)
         # Note: visit history requires coordinates not states. In this situation
         # they are equivalent.
-        coordinates = state
-        self._visitHistory.append(coordinates)
+        self._recordVisit(state)
 
         return True
 
@@ -69,17 +70,30 @@ class PositionSearchProblem(SearchProblem):
 
                 successors.append((nextState, action, cost))
 
-        # Bookkeeping for display purposes (the highlight in the GUI).
-        self._numExpanded += 1
-        if (state not in self._visitedLocations):
-            self._visitedLocations.add(state)
-            # Note: visit history requires coordinates not states. In this situation
-            # they are equivalent.
-            coordinates = state
-            self._visitHistory.append(coordinates)
+        self._recordExpansion(state)
 
         return successors
 
+    def reverseSuccessorStates(self, state):
+        """
+        Returns the positions that can move into this state, the actions that do it,
+        and the cost of moving into this state.
+        """
+
+        predecessors = []
+
+        for action in Directions.CARDINAL:
+            x, y = state
+            dx, dy = Actions.directionToVector(action)
+            previousx, previousy = int(x - dx), int(y - dy)
+
+            if (not self.walls[previousx][previousy]):
+                predecessors.append(((previousx, previousy), action, self.costFn(state)))
+
+        self._recordExpansion(state)
+
+        return predecessors
+
     def actionsCost(self, actions):
         """
         Returns the cost of a particular sequence of actions.
@@ -102,3 +116,10 @@ class PositionSearchProblem(SearchProblem):
             cost += self.costFn((x, y))
 
         return cost
+
+    def _recordExpansion(self, state):
+        # Bookkeeping for display purposes (the highlight in the GUI).
+        self._numExpanded += 1
+        # Note: visit history requires coordinates not states. In this situation
+        # they are equivalent.
+        self._recordVisit(state)
@@ -1,5 +1,18 @@
 import abc
 
+from pacai.core.search.stats import SearchStats
+
+# How much of the visit history (the highlight in the GUI) a problem records.
+# Nothing.
+RECORD_VISITS_OFF = 'off'
+# Every n-th visit.
+RECORD_VISITS_SAMPLED = 'sampled'
+# Every location the first time it is visited.
+RECORD_VISITS_FULL = 'full'
+
+VISIT_RECORDING_MODES = [RECORD_VISITS_OFF, RECORD_VISITS_SAMPLED, RECORD_VISITS_FULL]
+DEFAULT_VISIT_SAMPLE_INTERVAL = 10
+
 class SearchProblem(abc.ABC):
     """
     This class outlines the structure of a search problem.
@@ -32,6 +45,14 @@ class SearchProblem(abc.ABC):
         self._visitedLocations = set()
         self._visitHistory = []
 
+        # See `SearchProblem.setVisitRecording`.
+        self._visitRecording = RECORD_VISITS_FULL
+        self._visitSampleInterval = DEFAULT_VISIT_SAMPLE_INTERVAL
+        self._numVisits = 0
+
+        # Counters and timers that the searches fill in.
+        self._stats = SearchStats()
+
     @abc.abstractmethod
     def actionsCost(self, actions):
         """
@@ -46,9 +67,30 @@ class SearchProblem(abc.ABC):
     def getExpandedCount(self):
         return self._numExpanded
 
+    def getGoalState(self):
+        """
+        Get the single goal state of this problem,
+        or None if the problem does not have exactly one known goal state.
+
+        Problems with a goal state and `SearchProblem.reverseSuccessorStates`
+        can be solved by the bidirectional searches in `pacai.core.search.engine`.
+        """
+
+        return None
+
+    def getStats(self):
+        """
+        Get the `pacai.core.search.stats.SearchStats` of the searches run on this problem.
+        """
+
+        return self._stats
+
     def getVisitHistory(self):
         return self._visitHistory
 
+    def getVisitRecording(self):
+        return self._visitRecording
+
     @abc.abstractmethod
     def isGoal(self, state):
         """
@@ -60,6 +102,40 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def reverseSuccessorStates(self, state):
+        """
+        Answers the question:
+        What moves lead to this state?
+
+        Returns a list of tuples with three values:
+        (predecessor state, action that takes the predecessor to this state, cost of that action).
+        Only problems that support searching backwards from their goal implement this.
+        """
+
+        raise NotImplementedError('%s does not support searching backwards.' %
+                (type(self).__name__))
+
+    def setVisitRecording(self, mode, sampleInterval = DEFAULT_VISIT_SAMPLE_INTERVAL):
+        """
+        Choose how much of the visit history `SearchProblem._recordVisit` keeps:
+        `RECORD_VISITS_FULL` (the default), `RECORD_VISITS_SAMPLED`
+        (every sampleInterval-th visit, without tracking which locations were already seen),
+        or `RECORD_VISITS_OFF`.
+        Searches that are never displayed should turn recording off,
+        since the history can grow as large as the search.
+        """
+
+        if (mode not in VISIT_RECORDING_MODES):
+            raise ValueError('Unknown visit recording mode: %s. Expected one of: %s.' %
+                    (mode, VISIT_RECORDING_MODES))
+
+        if (sampleInterval < 1):
+            raise ValueError('The visit sample interval must be positive, found: %s.' %
+                    (sampleInterval))
+
+        self._visitRecording = mode
+        self._visitSampleInterval = sampleInterval
+
     @abc.abstractmethod
     def startingState(self):
         """
@@ -82,3 +158,23 @@ class SearchProblem(abc.ABC):
         """
 
         pass
+
+    def _recordVisit(self, coordinates):
+        """
+        Add a visit to the visit history (which the GUI highlights),
+        according to the visit recording mode.
+        """
+
+        if (self._visitRecording == RECORD_VISITS_OFF):
+            return
+
+        if (self._visitRecording == RECORD_VISITS_SAMPLED):
+            self._numVisits += 1
+            if (self._numVisits % self._visitSampleInterval == 0):
+                self._visitHistory.append(coordinates)
+
+            return
+
+        if (coordinates not in self._visitedLocations):
+            self._visitedLocations.add(coordinates)
+            self._visitHistory.append(coordinates)
@@ -0,0 +1,131 @@
+"""
+Instrumentation for searches.
+"""
+
+import contextlib
+import json
+import time
+
+class SearchStats(object):
+    """
+    Counters and timers that describe how a search went.
+    Every `pacai.core.search.problem.SearchProblem` has one (`SearchProblem.getStats`),
+    which the searches in `pacai.core.search.engine` and
+    `pacai.agents.search.base.SearchAgent` fill in.
+
+    The counters are plain attributes:
+    generated and expanded nodes, duplicates that were pruned instead of being put in the open list,
+    the peak sizes of the open (frontier) and closed lists, heuristic calls,
+    and the seconds spent in the heuristic, the successor function, and the whole search.
+    Anytime searches also set the suboptimality bound their path reached
+    (the path costs at most this many times the optimal cost), it is None for other searches.
+    """
+
+    def __init__(self):
+        self.generated = 0
+        self.expanded = 0
+        self.duplicatesPruned = 0
+
+        self.peakFrontierSize = 0
+        self.peakClosedSize = 0
+
+        self.heuristicCalls = 0
+        self.heuristicTime = 0.0
+
+        self.successorTime = 0.0
+        self.searchTime = 0.0
+
+        self.suboptimalityBound = None
+
+    def getExpansionsPerSecond(self):
+        """
+        Get the expansion rate over the whole search time,
+        or None if no search time has been recorded.
+        """
+
+        if (self.searchTime <= 0.0):
+            return None
+
+        return self.expanded / self.searchTime
+
+    def getHeuristicTimePerCall(self):
+        if (self.heuristicCalls == 0):
+            return None
+
+        return self.heuristicTime / self.heuristicCalls
+
+    def timeHeuristic(self, heuristic):
+        """
+        Wrap a heuristic (state, problem) -> estimate so that its calls and time are counted.
+        """
+
+        def timedHeuristic(state, problem):
+            startTime = time.perf_counter()
+            estimate = heuristic(state, problem)
+            self.heuristicTime += time.perf_counter() - startTime
+            self.heuristicCalls += 1
+
+            return estimate
+
+        return timedHeuristic
+
+    @contextlib.contextmanager
+    def timeSearch(self):
+        """
+        A context manager that adds the time spent inside of it to the search time.
+        """
+
+        startTime = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.searchTime += time.perf_counter() - startTime
+
+    def timeSuccessors(self, successorFunction):
+        """
+        Wrap a successor function (state) -> [(state, action, cost), ...]
+        so that every call counts as an expansion (and its successors as generated nodes).
+        """
+
+        def timedSuccessors(state):
+            startTime = time.perf_counter()
+            successors = successorFunction(state)
+            self.successorTime += time.perf_counter() - startTime
+
+            self.expanded += 1
+            self.generated += len(successors)
+
+            return successors
+
+        return timedSuccessors
+
+    def toDict(self):
+        return {
+            'generated': self.generated,
+            'expanded': self.expanded,
+            'duplicatesPruned': self.duplicatesPruned,
+            'peakFrontierSize': self.peakFrontierSize,
+            'peakClosedSize': self.peakClosedSize,
+            'heuristicCalls': self.heuristicCalls,
+            'heuristicTime': self.heuristicTime,
+            'heuristicTimePerCall': self.getHeuristicTimePerCall(),
+            'successorTime': self.successorTime,
+            'searchTime': self.searchTime,
+            'expansionsPerSecond': self.getExpansionsPerSecond(),
+            'suboptimalityBound': self.suboptimalityBound,
+        }
+
+    def toJSON(self, **kwargs):
+        """
+        Get the stats as a JSON string.
+        Any keyword arguments are passed to `json.dumps`.
+        """
+
+        return json.dumps(self.toDict(), **kwargs)
+
+    def updatePeaks(self, frontierSize, closedSize):
+        if (frontierSize > self.peakFrontierSize):
+            self.peakFrontierSize = frontierSize
+
+        if (closedSize > self.peakClosedSize):
+            self.peakClosedSize = closedSize
@@ -3,6 +3,7 @@ import random
 from pacai.agents.base import BaseAgent
 from pacai.agents.search.multiagent import MultiAgentSearchAgent
 from pacai.core import distance
+from pacai.core.directions import Directions
 
 
 class ReflexAgent(BaseAgent):
@@ -18,6 +19,9 @@ class ReflexAgent(BaseAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index, **kwargs)
 
+        # (state, {action: successor, ...}) for the state getAction() is looking at.
+        self._successors = None
+
     def getAction(self, gameState):
         """
         You do not need to change this method, but you're welcome to.
@@ -29,8 +33,10 @@ class ReflexAgent(BaseAgent):
         `pacai.core.directions.Directions`.
         """
 
-        # Collect legal moves.
-        legalMoves = gameState.getLegalActions()
+        # Collect legal moves (and their successors, for the evaluation function).
+        successors = gameState.generateSuccessors(self.index)
+        self._successors = (gameState, dict(successors))
+        legalMoves = [action for (action, successor) in successors]
 
         # Choose one of the best actions.
         scores = [self.evaluationFunction(gameState, action) for action in legalMoves]
@@ -49,7 +55,10 @@ class ReflexAgent(BaseAgent):
         Make sure to understand the range of different values before you combine them
         in your evaluation function.
         """
-        successorGameState = currentGameState.generatePacmanSuccessor(action)
+        if (self._successors is not None and self._successors[0] is currentGameState):
+            successorGameState = self._successors[1][action]
+        else:
+            successorGameState = currentGameState.generatePacmanSuccessor(action)
         # Useful information you can extract.
         newPosition = successorGameState.getPacmanPosition()
         # oldFood = currentGameState.getFood()
@@ -58,7 +67,7 @@ class ReflexAgent(BaseAgent):
         # newScaredTimes = [ghostState.getScaredTimer() for ghostState in newGhostStates]
         score = successorGameState.getScore()
         # *** Your Code Here ***
-        foods = successorGameState.getFood()
+        foods = successorGameState.getFoodView()
         foodList = foods.asList()
         minimum = 1000000
         # find closest food
@@ -117,16 +126,11 @@ class MinimaxAgent(MultiAgentSearchAgent):
         if currState.isOver():
             return self.evalFunction(currState)
         if agentIndex == (agentAmount - 1):
-            currActions = currState.getLegalActions(agentIndex)
-            # actions.remove('Stop')
-            for action in currActions:
-                next = currState.generateSuccessor(agentIndex, action)
+            for action, next in currState.generateSuccessors(agentIndex):
                 v = min(v, self.maxValue(next, 0, depth + 1, agentAmount))
             return v
         else:
-            currActions = currState.getLegalActions(agentIndex)
-            for action in currActions:
-                next = currState.generateSuccessor(agentIndex, action)
+            for action, next in currState.generateSuccessors(agentIndex):
                 v = min(v, self.minValue(next, agentIndex + 1, depth, agentAmount))
             return v
 
@@ -138,10 +142,9 @@ class MinimaxAgent(MultiAgentSearchAgent):
         if currState.isOver():
             return self.evalFunction(currState)
         if agentIndex == 0:
-            currActions = currState.getLegalActions(agentIndex)
-            currActions.remove('Stop')
-            for action in currActions:
-                next = currState.generateSuccessor(agentIndex, action)
+            for action, next in currState.generateSuccessors(agentIndex):
+                if action == Directions.STOP:
+                    continue
                 v = max(v, self.minValue(next, agentIndex + 1, depth, agentAmount))
             return v
 
@@ -152,10 +155,9 @@ class MinimaxAgent(MultiAgentSearchAgent):
         # tree_depth = self.getTreeDepth()
         # print("index: ", self.index)
         actions = []
-        currActions = state.getLegalActions()
-        currActions.remove('Stop')
-        for action in currActions:
-            next = state.generateSuccessor(self.index, action)
+        for action, next in state.generateSuccessors(self.index):
+            if action == Directions.STOP:
+                continue
             agentID = next.getLastAgentMoved()
             currentAct = (action, self.minValue(next, agentID + 1, 0, agentAmount))
             actions.append(currentAct)
@@ -290,10 +292,9 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         v = 0
         if agentIndex == 0:
             v = -10000000
-            currActions = currState.getLegalActions(agentIndex)
-            currActions.remove('Stop')
-            for action in currActions:
-                next = currState.generateSuccessor(agentIndex, action)
+            for action, next in currState.generateSuccessors(agentIndex):
+                if action == Directions.STOP:
+                    continue
                 v = max(v, self.value(next, agentIndex + 1, depth, agentAmount, True))
         return v
 
@@ -306,14 +307,12 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         v = 0
         # checks if agent is pacman or ghost
         if agentIndex != 0:
-            actions = currState.getLegalActions(agentIndex)
-            for action in actions:
-                next = currState.generateSuccessor(agentIndex, action)
+            actions = currState.generateSuccessors(agentIndex)
+            for action, next in actions:
                 v += self.value(next, 0, depth + 1, agentAmount, False)
         elif agentIndex % agentAmount != 0:
-            actions = currState.getLegalActions(agentIndex)
-            for action in actions:
-                next = currState.generateSuccessor(agentIndex, action)
+            actions = currState.generateSuccessors(agentIndex)
+            for action, next in actions:
                 v += self.value(next, agentIndex + 1, depth, agentAmount, True)
         # takes probability
         prob = v / len(actions)
@@ -337,10 +336,9 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         # tree_depth = self.getTreeDepth()
         # print("index: ", self.index)
         actions = []
-        currActions = state.getLegalActions()
-        currActions.remove('Stop')
-        for action in currActions:
-            next = state.generateSuccessor(self.index, action)
+        for action, next in state.generateSuccessors(self.index):
+            if action == Directions.STOP:
+                continue
             agentID = next.getLastAgentMoved()
             currentAct = (action, self.value(next, agentID + 1, 0, agentAmount, True))
             actions.append(currentAct)
@@ -367,7 +365,7 @@ def betterEvaluationFunction(currentGameState):
     game state of loss or win are weighted the heaviest in this evaluation function.
     """
     position = currentGameState.getPacmanPosition()
-    food = currentGameState.getFood()
+    food = currentGameState.getFoodView()
     foodAmount = currentGameState.getNumFood()
     foodList = food.asList()
     gameScore = currentGameState.getScore()
@@ -283,7 +283,7 @@ class OffensiveQAgent(QCap):
 
     def getReward(self, state, action):
         #reward if food eaten
-        if len(state.getFood().asList()) > len(state.generateSuccessor(self.index, action).getFood().asList()):
+        if len(state.getFoodView().asList()) > len(state.generateSuccessor(self.index, action).getFoodView().asList()):
             return 500
         return 0
 
@@ -214,7 +214,7 @@ class ClosestDotSearchAgent(SearchAgent):
 
         currentState = state
 
-        while (currentState.getFood().count() > 0):
+        while (currentState.getNumFood() > 0):
             nextPathSegment = self.findPathToClosestDot(currentState)  # The missing piece
             self._actions += nextPathSegment
 
@@ -267,7 +267,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         super().__init__(gameState, goal = None, start = start)
 
         # Store the food for later reference.
-        self.food = gameState.getFood()
+        self.food = gameState.getFoodView()
         # print(self.food)
 
     def isGoal(self, currentState):
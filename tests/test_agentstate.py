@@ -0,0 +1,103 @@
+import pickle
+import unittest
+
+from pacai.core.agentstate import AgentState
+from pacai.core.directions import Directions
+
+"""
+Test the agent states.
+"""
+class AgentStateTest(unittest.TestCase):
+    def test_copy(self):
+        agent = AgentState((1, 2), Directions.STOP, True)
+        agent.updatePosition((1, 0))
+        agent.setScaredTimer(3)
+        hash(agent)
+
+        copy = agent.copy()
+        self.assertIsNot(agent, copy)
+        self.assertEqual(agent, copy)
+        self.assertEqual(hash(agent), hash(copy))
+        self.assertEqual(agent.snapshot(), copy.snapshot())
+        self.assertEqual(str(agent), str(copy))
+
+        # Copies are independent, but share where they started.
+        copy.updatePosition((0, 1))
+        self.assertEqual((2, 2), agent.getPosition())
+        self.assertEqual((2, 3), copy.getPosition())
+
+        copy.respawn()
+        self.assertEqual(((1, 2), Directions.STOP, True),
+                (copy.getPosition(), copy.getDirection(), copy.isPacman()))
+        self.assertEqual(0, copy.getScaredTimer())
+
+    def test_equality_after_changes(self):
+        agent = AgentState((1, 2), Directions.STOP, False)
+        other = agent.copy()
+
+        changes = [
+            lambda state: state.updatePosition((1, 0)),
+            lambda state: state.updatePosition((0, 1)),
+            lambda state: state.setScaredTimer(5),
+            lambda state: state.decrementScaredTimer(),
+            lambda state: state.setIsPacman(True),
+            lambda state: state.updatePosition((0, 0.5)),
+            lambda state: state.snapToNearestPoint(),
+            lambda state: state.respawn(),
+        ]
+
+        for change in changes:
+            # Cache the hash, which the change must clear.
+            hash(agent)
+
+            change(agent)
+            self.assertNotEqual(other, agent)
+            self.assertEqual(hash(self._rebuild(agent)), hash(agent))
+
+            change(other)
+            self.assertEqual(other, agent)
+            self.assertEqual(hash(other), hash(agent))
+
+    def test_snapshot_restore(self):
+        agent = AgentState((1, 2), Directions.NORTH, True)
+        snapshot = agent.snapshot()
+        expected = agent.copy()
+
+        agent.updatePosition((1, 0))
+        agent.setScaredTimer(2)
+        agent.setIsPacman(False)
+        self.assertNotEqual(expected, agent)
+
+        agent.restore(snapshot)
+        self.assertEqual(snapshot, agent.snapshot())
+        self.assertEqual(expected, agent)
+        self.assertEqual(hash(expected), hash(agent))
+
+        # A snapshot taken with a cached hash restores the hash too.
+        hash(agent)
+        snapshot = agent.snapshot()
+        agent.updatePosition((0, 1))
+        agent.restore(snapshot)
+        self.assertEqual(hash(expected), hash(agent))
+
+    def test_compact(self):
+        agent = AgentState((1, 2), Directions.STOP, True)
+        self.assertFalse(hasattr(agent, '__dict__'))
+
+        loaded = pickle.loads(pickle.dumps(agent))
+        self.assertEqual(agent, loaded)
+        self.assertEqual(agent.snapshot(), loaded.snapshot())
+
+    def _rebuild(self, agent):
+        """
+        Build an equal agent from scratch, without any cached hash.
+        """
+
+        state = AgentState(agent.getPosition(), agent.getDirection(), agent.isPacman())
+        state.setScaredTimer(agent.getScaredTimer())
+
+        self.assertEqual(agent, state)
+        return state
+
+if __name__ == '__main__':
+    unittest.main()
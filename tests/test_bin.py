@@ -1,5 +1,9 @@
+import json
+import os
+import tempfile
 import unittest
 
+from pacai.bin import benchmark
 from pacai.bin import capture
 from pacai.bin import gridworld
 from pacai.bin import pacman
@@ -21,6 +25,29 @@ class BinTest(unittest.TestCase):
             # Expected exception.
             pass
 
+    def test_pacman_visit_recording(self):
+        # Nothing draws highlights without graphics.
+        args = pacman.readCommand(['-p', 'SearchAgent', '--null-graphics'])
+        self.assertEqual('off', args['pacman']._visitRecording)
+
+        # Agent arguments win over the display.
+        args = pacman.readCommand(['-p', 'SearchAgent', '--null-graphics',
+                '--agent-args', 'visitRecording=sampled'])
+        self.assertEqual('sampled', args['pacman']._visitRecording)
+
+    def test_pacman_search_stats(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            path = os.path.join(tempDir, 'stats.json')
+            pacman.main(['-p', 'SearchAgent', '-l', 'tinyMaze', '--null-graphics',
+                    '--agent-args', 'fn=astar,heuristic=manhattan', '--search-stats', path])
+
+            with open(path, 'r') as file:
+                stats = json.load(file)
+
+        self.assertEqual(8, stats['pathLength'])
+        self.assertGreater(stats['expanded'], 0)
+        self.assertGreater(stats['heuristicCalls'], 0)
+
     def test_pacman_help(self):
         # Show all pacman arguments.
         try:
@@ -29,6 +56,12 @@ class BinTest(unittest.TestCase):
             if status.code != 0:
                 self.fail("Error occured when running --help.")
 
+    def test_benchmark(self):
+        benchmark.main(['--seconds', '0.01', '--num-states', '5'])
+
+        results = benchmark.benchmarkAgentStates(seconds = 0.01)
+        self.assertLess(results['slotted'][0], results['plain'][0])
+
     def test_capture(self):
         # Run game of capture with default agents.
         capture.main(['--null-graphics'])
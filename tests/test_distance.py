@@ -0,0 +1,298 @@
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distance
+from pacai.core import distanceCalculator
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.util.lru import LRUCache
+
+# Two open areas that can not reach each other.
+LAYOUT = [
+    '%%%%%%%',
+    '%.   %%',
+    '% %% %%',
+    '%    %.',
+    '%%%%%%%',
+]
+
+"""
+Test the maze distances.
+"""
+class DistanceTest(unittest.TestCase):
+    def setUp(self):
+        # Never touch a real cache directory, tests that want one patch it again.
+        environment = unittest.mock.patch.dict(os.environ, {distanceCalculator.CACHE_DIR_ENV: ''})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def test_maze_distances(self):
+        distances = distanceCalculator.computeDistances(Layout(LAYOUT))
+
+        self.assertEqual(11, distances.getNumCells())
+        self.assertEqual(0, distances.getDistance((1, 1), (1, 1)))
+        self.assertEqual(2, distances.getDistance((1, 1), (1, 3)))
+        self.assertEqual(5, distances.getDistance((2, 3), (3, 1)))
+        self.assertEqual(5, distances.getDistance((3, 1), (2, 3)))
+
+        self.assertEqual(distanceCalculator.UNREACHABLE_DISTANCE,
+                distances.getDistance((1, 1), (6, 1)))
+
+        # Walls are not cells.
+        self.assertIsNone(distances.getDistance((0, 0), (1, 1)))
+        self.assertIsNone(distances.getIndex((2, 2)))
+
+        index = distances.getIndex((4, 2))
+        self.assertEqual((4, 2), distances.getPosition(index))
+
+    def test_distancer(self):
+        distancer = distanceCalculator.Distancer(Layout(LAYOUT))
+
+        # Manhattan until the distances are computed.
+        self.assertFalse(distancer.isReadyForMazeDistance())
+        self.assertEqual(3, distancer.getDistance((2, 3), (3, 1)))
+
+        distancer.getMazeDistances()
+        self.assertTrue(distancer.isReadyForMazeDistance())
+        self.assertEqual(5, distancer.getDistance((2, 3), (3, 1)))
+        self.assertEqual(5, distancer.getDistance((2.0, 3.0), (3, 1)))
+
+        # Half steps snap to the closest grid points.
+        self.assertEqual(1.5, distancer.getDistance((1, 1.5), (2, 1)))
+
+        self.assertRaises(Exception, distancer.getDistanceOnGrid, (0, 0), (1, 1))
+
+    def test_batched(self):
+        layout = Layout(LAYOUT)
+        source = (1, 1.5)
+        targets = [(2, 3), (1, 1), (4, 1.5), (3, 3), (1, 1)]
+
+        for threshold in [distanceCalculator.DEFAULT_LANDMARK_THRESHOLD, 0]:
+            distancer = distanceCalculator.Distancer(layout, landmarkThreshold = threshold)
+
+            # Before and after the distances are ready.
+            for i in range(2):
+                expected = [distancer.getDistance(source, target) for target in targets]
+                self.assertEqual(expected, distancer.getDistances(source, targets))
+
+                expected = [distancer.getDistance((4, 1), target) for target in targets]
+                self.assertEqual(expected, distancer.getDistances((4, 1), targets))
+
+                distancer.getMazeDistances()
+
+            self.assertEqual(((1, 1), 0.5), distancer.nearest(source, targets))
+            self.assertEqual(((4, 1.5), 0.5), distancer.nearest((4, 1), targets))
+            self.assertIsNone(distancer.nearest(source, []))
+
+    def test_incremental(self):
+        layout = Layout(LAYOUT)
+        expected = distanceCalculator.computeDistances(layout)
+
+        distances = distanceCalculator.MazeDistances(layout.walls)
+        self.assertEqual(0.0, distances.getProgress())
+        self.assertIsNone(distances.getDistanceByIndex(0, 1))
+
+        # A zero budget still computes one row.
+        self.assertFalse(distances.computeRows(0))
+        self.assertEqual(1, distances.getNumRowsComputed())
+
+        # Either row of a pair is enough.
+        self.assertEqual(expected.getDistanceByIndex(0, 5), distances.getDistanceByIndex(0, 5))
+        self.assertEqual(expected.getDistanceByIndex(5, 0), distances.getDistanceByIndex(5, 0))
+        self.assertIsNone(distances.getDistanceByIndex(5, 6))
+
+        self.assertTrue(distances.computeRows())
+        self.assertEqual(1.0, distances.getProgress())
+        self._assertSameDistances(expected, distances)
+
+    def test_landmarks(self):
+        layout = Layout(LAYOUT)
+        expected = distanceCalculator.computeDistances(layout)
+
+        landmarks = distanceCalculator.LandmarkDistances(layout.walls, numLandmarks = 3)
+        self.assertIsNone(landmarks.getDistanceByIndex(0, 1))
+        self.assertTrue(landmarks.computeRows())
+
+        # The second landmark covers the area the first one can't reach.
+        self.assertIn((6, 1), landmarks.getLandmarks()[:2])
+
+        for index1 in range(expected.getNumCells()):
+            for index2 in range(expected.getNumCells()):
+                distance = expected.getDistanceByIndex(index1, index2)
+                self.assertEqual(distance, landmarks.getDistanceByIndex(index1, index2))
+                self.assertLessEqual(landmarks.getLowerBoundByIndex(index1, index2), distance)
+
+        # Small boards can also be forced onto landmarks.
+        distancer = distanceCalculator.Distancer(layout, landmarkThreshold = 5)
+        distancer.getMazeDistances()
+        self.assertEqual(5, distancer.getDistance((2, 3), (3, 1)))
+        self.assertLessEqual(distancer.getLowerBound((2, 3), (3, 1)), 5)
+
+    def test_disk_cache(self):
+        layout = Layout(LAYOUT)
+        expected = distanceCalculator.computeDistances(layout)
+
+        # The disk cache is opt-in.
+        with unittest.mock.patch.dict(os.environ):
+            del os.environ[distanceCalculator.CACHE_DIR_ENV]
+            self.assertIsNone(distanceCalculator.getCacheDir())
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            with unittest.mock.patch.dict(os.environ, {distanceCalculator.CACHE_DIR_ENV: cacheDir}):
+                distanceCalculator._mazeDistancesCache.clear()
+                distances = distanceCalculator.getMazeDistances(layout.walls)
+                self.assertIs(distances, distanceCalculator.getMazeDistances(layout.walls))
+
+                paths = [os.path.join(cacheDir, name) for name in os.listdir(cacheDir)]
+                self.assertEqual(1, len(paths))
+
+                # A fresh process would map the saved distances in.
+                distanceCalculator._mazeDistancesCache.clear()
+                loaded = distanceCalculator.getMazeDistances(layout.walls)
+                self.assertIsNot(distances, loaded)
+                self._assertSameDistances(expected, loaded)
+
+                # Bad files are just recomputed.
+                with open(paths[0], 'wb') as file:
+                    file.write(b'PACD')
+
+                distanceCalculator._mazeDistancesCache.clear()
+                with self.assertLogs(level = 'WARNING'):
+                    recomputed = distanceCalculator.getMazeDistances(layout.walls)
+
+                self._assertSameDistances(expected, recomputed)
+
+            distanceCalculator._mazeDistancesCache.clear()
+
+    @unittest.skipIf(distanceCalculator.shared_memory is None, 'No shared memory.')
+    def test_shared_memory(self):
+        layout = Layout(LAYOUT)
+        walls = layout.walls
+        expected = distanceCalculator.computeDistances(layout)
+
+        with unittest.mock.patch.dict(os.environ, {distanceCalculator.CACHE_DIR_ENV: ''}):
+            distanceCalculator._mazeDistancesCache.clear()
+
+            name = distanceCalculator.publishMazeDistances(walls)
+            self.assertEqual(distanceCalculator.getSharedMemoryName(walls), name)
+
+            try:
+                shared = distanceCalculator.getMazeDistances(walls)
+                self._assertSameDistances(expected, shared)
+
+                self.assertIs(shared, distanceCalculator.attachMazeDistances(walls))
+                distanceCalculator.releaseMazeDistances(walls)
+                self.assertIs(shared, distanceCalculator.getMazeDistances(walls))
+
+                # Act like another process, which has to attach explicitly.
+                key = distanceCalculator.getWallsKey(walls)
+                publisherEntry = distanceCalculator._sharedBlocks.pop(key)
+                distanceCalculator._mazeDistancesCache.clear()
+
+                try:
+                    computed = distanceCalculator.getMazeDistances(walls)
+                    self.assertIsNot(shared, computed)
+                    distanceCalculator._mazeDistancesCache.clear()
+
+                    attached = distanceCalculator.attachMazeDistances(walls)
+                    self.assertIsNot(shared, attached)
+                    self._assertSameDistances(expected, attached)
+                    self.assertIs(attached, distanceCalculator.getMazeDistances(walls))
+
+                    distanceCalculator.releaseMazeDistances(walls)
+                    self.assertNotIn(key, distanceCalculator._sharedBlocks)
+                    self.assertIsNot(attached, distanceCalculator.getMazeDistances(walls))
+                finally:
+                    distanceCalculator._sharedBlocks[key] = publisherEntry
+                    distanceCalculator._mazeDistancesCache.put(key, shared)
+            finally:
+                distanceCalculator.unpublishMazeDistances(walls)
+
+            # Existing users can keep going.
+            self._assertSameDistances(expected, shared)
+
+            self.assertIsNone(distanceCalculator.attachMazeDistances(walls))
+            self.assertIsNot(shared, distanceCalculator.getMazeDistances(walls))
+
+            distanceCalculator._mazeDistancesCache.clear()
+
+    def test_cache_bound(self):
+        layout = Layout(LAYOUT)
+        otherLayout = Layout(LAYOUT[:3] + ['%    %%'] + LAYOUT[4:])
+        numBytes = distanceCalculator.computeDistances(layout).getNumBytes()
+
+        # Room for one table.
+        cache = LRUCache(numBytes, sizeFunction = lambda key, distances: distances.getNumBytes())
+        with unittest.mock.patch.object(distanceCalculator, '_mazeDistancesCache', cache):
+            distances = distanceCalculator.getMazeDistances(layout.walls)
+            self.assertIs(distances, distanceCalculator.getMazeDistances(layout.walls))
+
+            distanceCalculator.getMazeDistances(otherLayout.walls)
+            self.assertEqual(1, len(cache))
+            self.assertIsNot(distances, distanceCalculator.getMazeDistances(layout.walls))
+
+            if (distanceCalculator.shared_memory is None):
+                return
+
+            # Referenced shared distances outlive the cache entry.
+            with unittest.mock.patch.dict(os.environ, {distanceCalculator.CACHE_DIR_ENV: ''}):
+                distanceCalculator.publishMazeDistances(layout.walls)
+                try:
+                    shared = distanceCalculator.getMazeDistances(layout.walls)
+                    distanceCalculator.getMazeDistances(otherLayout.walls)
+                    self.assertNotIn(distanceCalculator.getWallsKey(layout.walls), cache)
+
+                    self.assertIs(shared, distanceCalculator.getMazeDistances(layout.walls))
+                    self.assertIs(shared, distanceCalculator.attachMazeDistances(layout.walls))
+                    distanceCalculator.releaseMazeDistances(layout.walls)
+                finally:
+                    distanceCalculator.unpublishMazeDistances(layout.walls)
+
+            self.assertIsNot(shared, distanceCalculator.getMazeDistances(layout.walls))
+
+    def test_maze(self):
+        layout = Layout(LAYOUT[:1] + ['%P   %%'] + LAYOUT[2:])
+        state = PacmanGameState(layout)
+        expected = distanceCalculator.computeDistances(layout)
+
+        self.assertEqual(5, distance.maze((2, 3), (3, 1), state))
+        self.assertEqual(5, distance.maze((3, 1), (2, 3), state))
+        self.assertEqual(0, distance.maze((1, 1), (6, 1), state))
+
+        self.assertRaises(ValueError, distance.maze, (0, 0), (1, 1), state)
+        self.assertRaises(ValueError, distance.maze, (1, 1), (2, 2), state)
+
+        # Every state on the same walls shares the oracle.
+        oracle = distance.getMazeOracle(layout.walls)
+        successor = state.generateSuccessor(0, Directions.EAST)
+        self.assertIs(oracle, distance.getMazeOracle(successor.getWalls()))
+
+        # Rows of two cells fit, so the third row evicts the first.
+        oracle = distance.MazeOracle(layout.walls, maxBytes = 2 * 4 * expected.getNumCells())
+        positions = [expected.getPosition(index) for index in range(expected.getNumCells())]
+
+        for position1 in positions:
+            for position2 in positions:
+                expectedDistance = expected.getDistance(position1, position2)
+                if (expectedDistance == distanceCalculator.UNREACHABLE_DISTANCE):
+                    expectedDistance = None
+
+                self.assertEqual(expectedDistance, oracle.getDistance(position1, position2))
+
+        stats = oracle.getCacheStats()
+        self.assertEqual(2, stats['items'])
+        self.assertGreater(stats['evictions'], 0)
+
+    def _assertSameDistances(self, expected, actual):
+        self.assertEqual(expected.getNumCells(), actual.getNumCells())
+
+        for index1 in range(expected.getNumCells()):
+            for index2 in range(expected.getNumCells()):
+                self.assertEqual(expected.getDistanceByIndex(index1, index2),
+                        actual.getDistanceByIndex(index1, index2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,262 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.gamestate import AbstractGameState
+from pacai.core.layout import Layout
+
+PACMAN_LAYOUT = [
+    '%%%%%%%',
+    '%P..o %',
+    '% %%% %',
+    '%.   G%',
+    '%%%%%%%',
+]
+
+CAPTURE_LAYOUT = [
+    '%%%%%%%%%%%%',
+    '%1.  o. ..4%',
+    '% %%%%%%%% %',
+    '%3. .o  . 2%',
+    '%%%%%%%%%%%%',
+]
+
+def _summarize(state):
+    """
+    Everything about a state that an action can change.
+    """
+
+    summary = [
+        hash(state), state.getScore(), state.isOver(), state.isWin(),
+        state.getLastAgentMoved(), state.getLastFoodEaten(), state.getLastCapsuleEaten(),
+        state.getFood().asList(), list(state.getCapsules()), state.getNumFood(),
+    ]
+
+    for agentState in state.getAgentStates():
+        summary.append((agentState.getPosition(), agentState.getDirection(),
+                agentState.isPacman(), agentState.getScaredTimer()))
+
+    if (isinstance(state, CaptureGameState)):
+        summary += [
+            state.getTimeleft(), state.getRedFood().asList(), state.getBlueFood().asList(),
+            state.getNumRedFood(), state.getNumBlueFood(),
+            list(state.getRedCapsules()), list(state.getBlueCapsules()),
+        ]
+
+    return summary
+
+"""
+Test the game states.
+"""
+class GameStateTest(unittest.TestCase):
+    def _pacmanState(self):
+        return PacmanGameState(Layout(PACMAN_LAYOUT))
+
+    def _captureState(self):
+        return CaptureGameState(Layout(CAPTURE_LAYOUT), 100)
+
+    def test_hash_matches_across_paths(self):
+        state = self._pacmanState()
+
+        # Pacman steps onto food and back, so the food is gone either way.
+        ate = state.generateSuccessor(0, Directions.EAST)
+        ate = ate.generateSuccessor(0, Directions.WEST)
+
+        again = state.generateSuccessor(0, Directions.EAST)
+        again = again.generateSuccessor(0, Directions.WEST)
+
+        self.assertNotEqual(hash(state), hash(ate))
+        self.assertEqual(hash(ate), hash(again))
+        self.assertEqual(ate, again)
+        self.assertNotEqual(state, ate)
+
+    def test_hash_tracks_food_and_agents(self):
+        state = self._pacmanState()
+        hashes = {hash(state)}
+
+        successor = state.generateSuccessor(0, Directions.EAST)
+        self.assertFalse(successor.hasFood(2, 3))
+        self.assertTrue(state.hasFood(2, 3))
+        hashes.add(hash(successor))
+
+        successor = successor.generateSuccessor(1, Directions.NORTH)
+        hashes.add(hash(successor))
+
+        self.assertEqual(3, len(hashes))
+
+    def test_capture_hash(self):
+        state = self._captureState()
+        successor = state.generateSuccessor(0, Directions.EAST)
+
+        self.assertNotEqual(hash(state), hash(successor))
+        self.assertEqual(hash(successor), hash(state.generateSuccessor(0, Directions.EAST)))
+
+    def test_apply_undo_pacman(self):
+        self._checkApplyUndo(self._pacmanState())
+
+    def test_apply_undo_capture(self):
+        self._checkApplyUndo(self._captureState())
+
+    def _checkApplyUndo(self, state):
+        rng = random.Random(4)
+        agentIndex = 0
+
+        for i in range(200):
+            if (state.isOver()):
+                break
+
+            before = _summarize(state)
+
+            for action in state.getLegalActions(agentIndex):
+                successor = state.generateSuccessor(agentIndex, action)
+
+                record = state.applyAction(agentIndex, action)
+                self.assertEqual(_summarize(successor), _summarize(state))
+                self.assertEqual(successor, state)
+
+                state.undoAction(record)
+                self.assertEqual(before, _summarize(state))
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            state = state.generateSuccessor(agentIndex, action)
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+            self._checkFoodCounts(state)
+
+    def _checkFoodCounts(self, state):
+        self.assertEqual(state.getFood().count(), state.getNumFood())
+
+        if (isinstance(state, CaptureGameState)):
+            self.assertEqual(state.getRedFood().count(), state.getNumRedFood())
+            self.assertEqual(state.getBlueFood().count(), state.getNumBlueFood())
+            self.assertEqual(state.getNumFood(), state.getNumRedFood() + state.getNumBlueFood())
+
+    def test_generate_successors(self):
+        for state in [self._pacmanState(), self._captureState()]:
+            rng = random.Random(4)
+            agentIndex = 0
+
+            for i in range(100):
+                if (state.isOver()):
+                    break
+
+                successors = state.generateSuccessors(agentIndex)
+                self.assertEqual(state.getLegalActions(agentIndex),
+                        [action for (action, successor) in successors])
+
+                for action, successor in successors:
+                    expected = state.generateSuccessor(agentIndex, action)
+                    self.assertEqual(_summarize(expected), _summarize(successor))
+
+                state = rng.choice(successors)[1]
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def test_apply_illegal(self):
+        state = self._pacmanState()
+        before = _summarize(state)
+
+        self.assertRaises(ValueError, state.applyAction, 0, Directions.NORTH)
+        self.assertEqual(before, _summarize(state))
+
+    def test_bytes_round_trip_pacman(self):
+        self._checkBytesRoundTrip(self._pacmanState())
+
+    def test_bytes_round_trip_capture(self):
+        self._checkBytesRoundTrip(self._captureState())
+
+    def _checkBytesRoundTrip(self, state):
+        rng = random.Random(4)
+        agentIndex = 0
+        layout = state.getInitialLayout()
+
+        for i in range(200):
+            data = state.toBytes()
+
+            # Find the layout by its content hash, and with an explicit layout.
+            for copy in [type(state).fromBytes(data), type(state).fromBytes(data, layout)]:
+                self.assertEqual(_summarize(state), _summarize(copy))
+                self.assertEqual(state, copy)
+                self.assertEqual(data, copy.toBytes())
+
+            if (state.isOver()):
+                break
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            state = state.generateSuccessor(agentIndex, action)
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def test_bytes_errors(self):
+        state = self._pacmanState()
+        data = state.toBytes()
+
+        otherLayout = Layout(PACMAN_LAYOUT[:-2] + ['%.  G %', '%%%%%%%'])
+
+        self.assertRaises(ValueError, PacmanGameState.fromBytes, data, otherLayout)
+        self.assertRaises(ValueError, PacmanGameState.fromBytes, data[:-1])
+        self.assertRaises(ValueError, PacmanGameState.fromBytes, data + b'\0')
+        self.assertRaises(ValueError, PacmanGameState.fromBytes, b'\xff' + data[1:])
+
+    def test_successor_cache(self):
+        state = self._pacmanState()
+
+        # Room for about two successors.
+        AbstractGameState.enableSuccessorCache()
+        state.generateSuccessor(0, Directions.EAST)
+        entryBytes = AbstractGameState.getSuccessorCacheStats()['size']
+
+        AbstractGameState.enableSuccessorCache(maxBytes = int(entryBytes * 2.5))
+        try:
+            first = state.generateSuccessor(0, Directions.EAST)
+            second = state.generateSuccessor(0, Directions.EAST)
+            self.assertIsNot(first, second)
+            self.assertEqual(first, second)
+
+            # An equal state shares the cached successor.
+            other = PacmanGameState(state.getInitialLayout())
+            self.assertEqual(first, other.generateSuccessor(0, Directions.EAST))
+
+            state.generateSuccessor(0, Directions.SOUTH)
+            state.generateSuccessor(0, Directions.STOP)
+            self.assertEqual(first, state.generateSuccessor(0, Directions.EAST))
+
+            stats = AbstractGameState.getSuccessorCacheStats()
+            self.assertEqual(2, stats['hits'])
+            self.assertEqual(4, stats['misses'])
+            self.assertEqual(2, stats['evictions'])
+            self.assertLessEqual(stats['size'], stats['maxSize'])
+        finally:
+            AbstractGameState.disableSuccessorCache()
+
+        self.assertIsNone(AbstractGameState.getSuccessorCacheStats())
+
+    def test_successor_cache_mutation(self):
+        state = self._pacmanState()
+
+        AbstractGameState.enableSuccessorCache()
+        try:
+            first = state.generateSuccessor(0, Directions.EAST)
+            expected = first.toBytes()
+
+            first.addScore(100)
+            first.eatFood(*first.getFood().asList()[0])
+            first.setHighlightLocations([(1, 1)])
+            first.getAgentState(0).updatePosition((0, 1))
+            first.endGame(True)
+
+            second = state.generateSuccessor(0, Directions.EAST)
+            self.assertEqual(expected, second.toBytes())
+            self.assertEqual([], second.getHighlightLocations())
+            self.assertFalse(second.isOver())
+            self.assertEqual(1, AbstractGameState.getSuccessorCacheStats()['hits'])
+
+            # Changing the parent does not disturb the cache either.
+            state.addScore(1)
+            state.generateSuccessor(0, Directions.EAST)
+            self.assertEqual(1, AbstractGameState.getSuccessorCacheStats()['hits'])
+        finally:
+            AbstractGameState.disableSuccessorCache()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from pacai.core.grid import BitGrid
+from pacai.core.grid import Grid
+
+"""
+Test the grid containers.
+"""
+class GridTest(unittest.TestCase):
+    def _buildGrids(self):
+        grid = Grid(5, 3)
+        bitGrid = BitGrid(5, 3)
+
+        for (x, y) in [(0, 0), (1, 2), (3, 1), (4, 2)]:
+            grid[x][y] = True
+            bitGrid[x][y] = True
+
+        return grid, bitGrid
+
+    def test_bitgrid_matches_grid(self):
+        grid, bitGrid = self._buildGrids()
+
+        self.assertEqual(grid.asList(), bitGrid.asList())
+        self.assertEqual(grid.asList(False), bitGrid.asList(False))
+        self.assertEqual(grid.count(), bitGrid.count())
+        self.assertEqual(grid.count(False), bitGrid.count(False))
+        self.assertEqual(hash(grid), hash(bitGrid))
+        self.assertEqual(str(grid), str(bitGrid))
+
+        self.assertTrue(bitGrid == grid)
+        self.assertTrue(grid == bitGrid)
+
+        for x in range(grid.getWidth()):
+            for y in range(grid.getHeight()):
+                self.assertIs(grid[x][y], bitGrid[x][y])
+
+    def test_bitgrid_copy_on_write(self):
+        _, bitGrid = self._buildGrids()
+        originalHash = hash(bitGrid)
+
+        copy = bitGrid.copy()
+        copy[1][2] = False
+
+        self.assertTrue(bitGrid[1][2])
+        self.assertFalse(copy[1][2])
+        self.assertEqual(originalHash, hash(bitGrid))
+        self.assertNotEqual(hash(bitGrid), hash(copy))
+        self.assertEqual(bitGrid.count() - 1, copy.count())
+
+    def test_frozen_view(self):
+        grid, bitGrid = self._buildGrids()
+        view = bitGrid.view()
+
+        self.assertEqual(grid.asList(), view.asList())
+        self.assertEqual(bitGrid.count(), view.count())
+        self.assertEqual(bitGrid, view)
+        self.assertEqual(hash(bitGrid), hash(view))
+        self.assertTrue(view[3][1])
+
+        def write(x, y):
+            view[x][y] = False
+
+        self.assertRaises(TypeError, write, 3, 1)
+        self.assertRaises(TypeError, view.set, 3, 1, False)
+        self.assertTrue(view[3][1])
+
+        # Copies are writable again.
+        copy = view.copy()
+        copy[3][1] = False
+        self.assertFalse(copy[3][1])
+        self.assertTrue(view[3][1])
+
+    def test_bitgrid_bytes(self):
+        grid, bitGrid = self._buildGrids()
+
+        data = bitGrid.toBytes()
+        self.assertEqual(BitGrid.getNumBytes(5, 3), len(data))
+        self.assertEqual(bitGrid, BitGrid.fromBytes(5, 3, data))
+
+        self.assertRaises(ValueError, BitGrid.fromBytes, 5, 3, data + b'\0')
+        self.assertRaises(ValueError, BitGrid.fromBytes, 5, 3, b'\xff\xff')
+
+    def test_bitgrid_keep_columns(self):
+        grid, bitGrid = self._buildGrids()
+
+        left = bitGrid.keepColumns(0, 2)
+        right = bitGrid.keepColumns(2, 5)
+
+        self.assertEqual([(x, y) for (x, y) in grid.asList() if x < 2], left.asList())
+        self.assertEqual([(x, y) for (x, y) in grid.asList() if x >= 2], right.asList())
+
+    def test_bitgrid_bounds(self):
+        bitGrid = BitGrid(2, 2)
+
+        self.assertRaises(IndexError, lambda: bitGrid[2])
+        self.assertRaises(IndexError, lambda: bitGrid[0][2])
+        self.assertRaises(ValueError, lambda: bitGrid.set(0, 0, 1))
+
+if __name__ == '__main__':
+    unittest.main()
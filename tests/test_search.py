@@ -0,0 +1,322 @@
+import json
+import unittest
+
+from pacai.agents.search.base import SearchAgent
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.search import engine
+from pacai.core.search import heuristic
+from pacai.core.layout import Layout
+from pacai.core.search.food import CompactFoodSearchProblem
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.search.problem import RECORD_VISITS_FULL
+from pacai.core.search.problem import RECORD_VISITS_OFF
+from pacai.core.search.problem import RECORD_VISITS_SAMPLED
+from pacai.core.search.problem import SearchProblem
+
+LAYOUT = [
+    '%%%%%%%%%%',
+    '%P     % %',
+    '% %%%%%% %',
+    '% %    % %',
+    '% %%%%%% %',
+    '%        %',
+    '%%%%%%%%%%',
+]
+
+FOOD_LAYOUT = [
+    '%%%%%%%',
+    '%P. . %',
+    '% %%%.%',
+    '%.    %',
+    '%%%%%%%',
+]
+
+GOAL = (8, 5)
+SHORTEST_PATH_LENGTH = 15
+
+"""
+Test the search engine.
+"""
+class SearchEngineTest(unittest.TestCase):
+    def _problem(self, goal = GOAL):
+        state = PacmanGameState(Layout(LAYOUT))
+        return PositionSearchProblem(state, goal = goal)
+
+    def _assertReachesGoal(self, problem, actions, goal = GOAL):
+        self.assertLess(problem.actionsCost(actions), 999999)
+
+        state = problem.startingState()
+        for action in actions:
+            successors = {successorAction: successor
+                    for (successor, successorAction, cost) in problem.successorStates(state)}
+            state = successors[action]
+
+        self.assertEqual(goal, state)
+
+    def test_optimal_searches(self):
+        searches = [
+            engine.bfs,
+            engine.ucs,
+            engine.astar,
+            lambda problem: engine.astar(problem, heuristic.manhattan),
+            engine.bibfs,
+            engine.biastar,
+            lambda problem: engine.biastar(problem, heuristic.manhattan),
+        ]
+
+        for tieBreaking in engine.TIE_BREAKING_POLICIES:
+            searches.append(lambda problem, tieBreaking = tieBreaking:
+                    engine.astar(problem, heuristic.manhattan, tieBreaking = tieBreaking))
+
+        for search in searches:
+            problem = self._problem()
+            actions = search(problem)
+
+            self.assertEqual(SHORTEST_PATH_LENGTH, len(actions))
+            self._assertReachesGoal(problem, actions)
+
+    def test_suboptimal_searches(self):
+        problem = self._problem()
+        actions = engine.dfs(problem)
+        self._assertReachesGoal(problem, actions)
+
+        problem = self._problem()
+        actions = engine.wastar(problem, heuristic.manhattan, weight = 3.0)
+        self.assertLessEqual(len(actions), 3.0 * SHORTEST_PATH_LENGTH)
+        self._assertReachesGoal(problem, actions)
+
+        self.assertRaises(ValueError, engine.wastar, problem, heuristic.manhattan, weight = 0.5)
+        self.assertRaises(ValueError, engine.astar, problem, tieBreaking = 'random')
+
+    def test_no_path(self):
+        for search in [engine.bfs, engine.dfs, engine.ucs, engine.astar,
+                engine.bibfs, engine.biastar]:
+            # Unreachable, and already there.
+            self.assertEqual([], search(self._problem(goal = (4, 3))))
+            self.assertEqual([], search(self._problem(goal = (1, 5))))
+
+    def test_reverse_successors(self):
+        problem = self._problem()
+        self.assertEqual(GOAL, problem.getGoalState())
+
+        for state in [(1, 5), (1, 1), (8, 3)]:
+            for (predecessor, action, cost) in problem.reverseSuccessorStates(state):
+                self.assertIn((state, action, cost), problem.successorStates(predecessor))
+
+    def test_bidirectional_needs_goal(self):
+        state = PacmanGameState(Layout(LAYOUT))
+        problem = PositionSearchProblem(state, goal = None)
+
+        self.assertRaises(ValueError, engine.bibfs, problem)
+        self.assertRaises(ValueError, engine.biastar, problem)
+
+    def test_bidirectional_expansions(self):
+        problem = self._problem()
+        engine.bfs(problem)
+
+        bidirectionalProblem = self._problem()
+        engine.bibfs(bidirectionalProblem)
+
+        self.assertLess(bidirectionalProblem.getExpandedCount(), problem.getExpandedCount())
+        self.assertEqual(bidirectionalProblem.getExpandedCount(),
+                len(bidirectionalProblem.getVisitHistory()))
+
+    def test_fewer_expansions(self):
+        astarProblem = self._problem()
+        engine.astar(astarProblem, heuristic.manhattan)
+
+        ucsProblem = self._problem()
+        engine.ucs(ucsProblem)
+
+        self.assertLessEqual(astarProblem.getExpandedCount(), ucsProblem.getExpandedCount())
+
+    def test_compact_food_problem(self):
+        state = PacmanGameState(Layout(FOOD_LAYOUT))
+        problem = FoodSearchProblem(state)
+        compactProblem = CompactFoodSearchProblem(state)
+
+        start = problem.startingState()
+        compactStart = compactProblem.startingState()
+        self.assertIsInstance(compactStart[0], int)
+        self.assertIsInstance(compactStart[1], int)
+
+        self.assertEqual((1, 3), compactProblem.getPosition(compactStart))
+        self.assertEqual(4, compactProblem.getNumFood(compactStart))
+        self.assertEqual(start[1], compactProblem.getFoodGrid(compactStart))
+        self.assertEqual(start[1].asList(), compactProblem.getFoodPositions(compactStart))
+        self.assertEqual(compactProblem.getAllFood(), compactProblem.getFoodPositions(compactStart))
+
+        # Successors match the grid states.
+        successors = problem.successorStates(start)
+        compactSuccessors = compactProblem.successorStates(compactStart)
+        self.assertEqual(len(successors), len(compactSuccessors))
+
+        for ((nextState, action, cost), (compactState, compactAction, compactCost)) in \
+                zip(successors, compactSuccessors):
+            self.assertEqual((action, cost), (compactAction, compactCost))
+            self.assertEqual(nextState[0], compactProblem.getPosition(compactState))
+            self.assertEqual(nextState[1], compactProblem.getFoodGrid(compactState))
+
+        actions = engine.astar(problem, heuristic.numFood)
+        compactActions = engine.astar(compactProblem, heuristic.numFood)
+        self.assertEqual(problem.actionsCost(actions), compactProblem.actionsCost(compactActions))
+        self.assertEqual(9, len(compactActions))
+
+    def test_num_food_other_problems(self):
+        state = PacmanGameState(Layout(FOOD_LAYOUT))
+
+        class GridProblem(SearchProblem):
+            def actionsCost(self, actions):
+                return len(actions)
+
+            def isGoal(self, state):
+                return state[1].count() == 0
+
+            def startingState(self):
+                return (state.getPacmanPosition(), state.getFood())
+
+            def successorStates(self, state):
+                return []
+
+        problem = GridProblem()
+        self.assertEqual(4, heuristic.numFood(problem.startingState(), problem))
+
+    def test_food_heuristics(self):
+        state = PacmanGameState(Layout(FOOD_LAYOUT))
+
+        for problemClass in [FoodSearchProblem, CompactFoodSearchProblem]:
+            for foodHeuristic in [heuristic.mst, heuristic.farthestPair]:
+                problem = problemClass(state)
+                actions = engine.astar(problem, foodHeuristic)
+                self.assertEqual(9, len(actions))
+                self.assertIn(heuristic.FOOD_DISTANCES_KEY, problem.heuristicInfo)
+
+        problem = CompactFoodSearchProblem(state)
+        start = problem.startingState()
+        foodDistances = heuristic.getFoodDistances(problem)
+
+        self.assertIs(foodDistances, heuristic.getFoodDistances(problem))
+        self.assertEqual(problem.getAllFood(), foodDistances.getFoodPositions())
+        self.assertEqual(start[1], foodDistances.getMask(problem.getFoodGrid(start)))
+
+        # Food: (1, 1), (2, 3), (4, 3), (5, 2), and Pacman is at (1, 3).
+        self.assertEqual(4, foodDistances.getDistance(1, 3))
+        self.assertEqual([2, 1], foodDistances.getDistancesFrom((1, 3), [0, 1]))
+
+        # Closest food, and a tree of 3 + 2 + 2.
+        self.assertEqual(1 + 7, heuristic.mst(start, problem))
+        self.assertEqual({start[1]: 7}, problem.heuristicInfo[heuristic.MST_KEY])
+
+        # The pair (1, 1) and (4, 3), and the closer one of them.
+        self.assertEqual(5 + 2, heuristic.farthestPair(start, problem))
+        self.assertEqual({start[1]: (0, 2)}, problem.heuristicInfo[heuristic.FARTHEST_PAIR_KEY])
+
+        self.assertEqual(0, heuristic.mst((start[0], 0), problem))
+        self.assertEqual(0, heuristic.farthestPair((start[0], 0), problem))
+
+    def test_stats(self):
+        for search in [engine.bfs, engine.dfs, engine.ucs, engine.bibfs,
+                lambda problem: engine.astar(problem, heuristic.manhattan),
+                lambda problem: engine.biastar(problem, heuristic.manhattan)]:
+            problem = self._problem()
+            search(problem)
+
+            stats = problem.getStats()
+            self.assertEqual(problem.getExpandedCount(), stats.expanded)
+            self.assertGreaterEqual(stats.generated, stats.expanded)
+            self.assertGreater(stats.duplicatesPruned, 0)
+            self.assertGreater(stats.peakFrontierSize, 0)
+            self.assertGreater(stats.peakClosedSize, 0)
+            self.assertGreater(stats.searchTime, 0.0)
+            self.assertGreater(stats.getExpansionsPerSecond(), 0.0)
+
+        self.assertGreater(stats.heuristicCalls, 0)
+        self.assertEqual(stats.toDict(), json.loads(stats.toJSON()))
+
+        problem = self._problem()
+        self.assertIsNone(problem.getStats().getExpansionsPerSecond())
+        self.assertIsNone(problem.getStats().getHeuristicTimePerCall())
+
+    def test_anytime(self):
+        problem = self._problem()
+        actions = engine.anytime(problem, heuristic.manhattan, timeBudget = None)
+        self.assertEqual(SHORTEST_PATH_LENGTH, len(actions))
+        self.assertEqual(1.0, problem.getStats().suboptimalityBound)
+
+        # Without any time, only the first path is found.
+        problem = self._problem()
+        search = engine.AnytimeSearch(problem, heuristic.manhattan, initialWeight = 5.0)
+        self.assertEqual(float('inf'), search.getBound())
+
+        actions = search.improve(timeBudget = 0.0)
+        self._assertReachesGoal(problem, actions)
+        self.assertEqual(5.0, search.getWeight())
+        self.assertLessEqual(1.0, search.getBound())
+        self.assertLessEqual(search.getBound(), 5.0)
+        self.assertLessEqual(len(actions), search.getBound() * SHORTEST_PATH_LENGTH)
+
+        # More time keeps improving it.
+        bound = search.getBound()
+        actions = search.improve()
+        self.assertTrue(search.isDone())
+        self.assertLessEqual(search.getBound(), bound)
+        self.assertEqual(SHORTEST_PATH_LENGTH, len(actions))
+        self.assertEqual(actions, search.improve(timeBudget = 0.0))
+
+        state = PacmanGameState(Layout(FOOD_LAYOUT))
+        problem = CompactFoodSearchProblem(state)
+        self.assertEqual(9, len(engine.anytime(problem, heuristic.mst, timeBudget = None)))
+
+        self.assertEqual([], engine.anytime(self._problem(goal = (4, 3))))
+        self.assertRaises(ValueError, engine.AnytimeSearch, problem, initialWeight = 0.5)
+        self.assertRaises(ValueError, engine.AnytimeSearch, problem, weightStep = 0.0)
+
+        agent = SearchAgent(0, fn = 'anytime', heuristic = 'manhattan', timeBudget = '10',
+                prob = lambda state: PositionSearchProblem(state, goal = GOAL))
+        agent.registerInitialState(PacmanGameState(Layout(LAYOUT)))
+        self.assertEqual(SHORTEST_PATH_LENGTH, len(agent._actions))
+
+    def test_visit_recording(self):
+        fullProblem = self._problem()
+        self.assertEqual(RECORD_VISITS_FULL, fullProblem.getVisitRecording())
+        engine.bfs(fullProblem)
+
+        history = fullProblem.getVisitHistory()
+        self.assertEqual(len(set(history)), len(history))
+
+        offProblem = self._problem()
+        offProblem.setVisitRecording(RECORD_VISITS_OFF)
+        engine.bfs(offProblem)
+
+        self.assertEqual([], offProblem.getVisitHistory())
+        self.assertEqual(fullProblem.getExpandedCount(), offProblem.getExpandedCount())
+
+        sampledProblem = self._problem()
+        sampledProblem.setVisitRecording(RECORD_VISITS_SAMPLED, sampleInterval = 3)
+        engine.bfs(sampledProblem)
+
+        sampledHistory = sampledProblem.getVisitHistory()
+        self.assertGreater(len(sampledHistory), 0)
+        self.assertLess(len(sampledHistory), len(history))
+        self.assertLessEqual(set(sampledHistory), set(history))
+
+        self.assertRaises(ValueError, offProblem.setVisitRecording, 'some')
+        self.assertRaises(ValueError, offProblem.setVisitRecording, RECORD_VISITS_SAMPLED, 0)
+
+        agent = SearchAgent(0, fn = 'bfs', visitRecording = RECORD_VISITS_OFF,
+                prob = lambda state: PositionSearchProblem(state, goal = GOAL))
+        agent.registerInitialState(PacmanGameState(Layout(LAYOUT)))
+        self.assertEqual(SHORTEST_PATH_LENGTH, len(agent._actions))
+
+    def test_agent_short_names(self):
+        state = PacmanGameState(Layout(LAYOUT))
+
+        agent = SearchAgent(0, fn = 'astar', heuristic = 'manhattan',
+                prob = lambda state: PositionSearchProblem(state, goal = GOAL))
+        agent.registerInitialState(state)
+
+        self.assertEqual(SHORTEST_PATH_LENGTH, len(agent._actions))
+
+if __name__ == '__main__':
+    unittest.main()
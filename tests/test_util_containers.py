@@ -1,5 +1,6 @@
 import unittest
 
+from pacai.util import lru
 from pacai.util import priorityQueue
 from pacai.util import queue
 from pacai.util import stack
@@ -52,5 +53,72 @@ class UtilContainersTest(unittest.TestCase):
         for val, pri in reversed(val_list):
             self.assertEqual(val, testPriorityQueue.pop())
 
+    def test_indexed_priority_queue(self):
+        testPriorityQueue = priorityQueue.IndexedPriorityQueue()
+        self.assertTrue(testPriorityQueue.isEmpty())
+
+        for val in range(1, 10):
+            self.assertTrue(testPriorityQueue.push(val, val))
+        self.assertEqual(9, len(testPriorityQueue))
+
+        # Items are only held once, and keep their lowest priority.
+        self.assertFalse(testPriorityQueue.push(3, 5))
+        self.assertTrue(testPriorityQueue.push(8, 0))
+        testPriorityQueue.decreaseKey(6, -1)
+        self.assertEqual(9, len(testPriorityQueue))
+
+        self.assertTrue(testPriorityQueue.contains(3))
+        self.assertIn(3, testPriorityQueue)
+        self.assertNotIn(10, testPriorityQueue)
+        self.assertEqual(3, testPriorityQueue.priorityOf(3))
+        self.assertEqual(-1, testPriorityQueue.priorityOf(6))
+
+        self.assertRaises(ValueError, testPriorityQueue.decreaseKey, 3, 4)
+        self.assertRaises(KeyError, testPriorityQueue.decreaseKey, 10, 4)
+        self.assertRaises(KeyError, testPriorityQueue.priorityOf, 10)
+
+        self.assertEqual([(1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, -1), (7, 7), (8, 0), (9, 9)],
+                sorted(testPriorityQueue.items()))
+
+        self.assertEqual((6, -1), testPriorityQueue.peekWithPriority())
+        self.assertEqual((6, -1), testPriorityQueue.popWithPriority())
+        self.assertEqual([8, 1, 2, 3, 4, 5, 7, 9],
+                [testPriorityQueue.pop() for i in range(len(testPriorityQueue))])
+        self.assertTrue(testPriorityQueue.isEmpty())
+        self.assertNotIn(6, testPriorityQueue)
+
+    def test_lru_cache(self):
+        cache = lru.LRUCache(3)
+
+        for val in range(3):
+            cache.put(val, str(val))
+        self.assertEqual(3, len(cache))
+
+        # Touch 0 so that 1 is the least recently used.
+        self.assertEqual('0', cache.get(0))
+        cache.put(3, '3')
+
+        self.assertFalse(1 in cache)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(['0', '2', '3'], [cache.get(val) for val in [0, 2, 3]])
+
+        stats = cache.getStats()
+        self.assertEqual(4, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(1, stats['evictions'])
+
+        # Sized items.
+        sizedCache = lru.LRUCache(10, sizeFunction = lambda key, value: len(value))
+        sizedCache.put('a', 'a' * 6)
+        sizedCache.put('b', 'b' * 6)
+        sizedCache.put('c', 'c' * 11)
+
+        self.assertEqual(['b'], [key for key in 'abc' if key in sizedCache])
+        self.assertEqual(6, sizedCache.getSize())
+
+        self.assertEqual('b' * 6, sizedCache.remove('b'))
+        self.assertIsNone(sizedCache.remove('b'))
+        self.assertEqual(0, sizedCache.getSize())
+
 if __name__ == '__main__':
     unittest.main()
@@ -60,6 +60,10 @@ class AbstractGUIView(AbstractView):
         self._dead = False
         self._keyboard = None
 
+    # Override
+    def drawsHighlights(self):
+        return True
+
     # Override
     def finish(self):
         super().finish()
@@ -56,6 +56,14 @@ class AbstractView(abc.ABC):
             images[0].save(self._gifPath, save_all = True, append_images = images,
                     duration = gifTimePerFrameMS, loop = 0, optimize = False)
 
+    def drawsHighlights(self):
+        """
+        Whether this view draws the highlight locations of states.
+        Only views that produce images (a GUI or a gif) do.
+        """
+
+        return self._saveFrames
+
     def getKeyboard(self):
         """
         For views that support keyboards, get an instance of a pacai.ui.keyboard.Keyboard.
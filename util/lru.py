@@ -0,0 +1,126 @@
+"""
+A least-recently-used cache container.
+"""
+
+import collections
+
+class LRUCache(object):
+    """
+    A bounded mapping that evicts the least recently used items when it gets too full.
+
+    Every item has a size (from the optional size function, otherwise 1),
+    so the bound can either be a number of items or an estimate of memory.
+    Hits, misses, and evictions are counted and can be read back with `LRUCache.getStats`.
+    """
+
+    def __init__(self, maxSize, sizeFunction = None):
+        """
+        sizeFunction (key, value) -> size
+        """
+
+        if (maxSize <= 0):
+            raise ValueError('LRU caches must have a positive max size, found: %s.' % (maxSize))
+
+        self._maxSize = maxSize
+        self._sizeFunction = sizeFunction
+
+        # {key: (value, size), ...}, ordered from least to most recently used.
+        self._items = collections.OrderedDict()
+        self._size = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def clear(self):
+        """
+        Remove all items, but keep the counters.
+        """
+
+        self._items.clear()
+        self._size = 0
+
+    def get(self, key, default = None):
+        """
+        Get the value for a key (and mark it as recently used),
+        or the default if the key is not in the cache.
+        """
+
+        entry = self._items.get(key)
+        if (entry is None):
+            self._misses += 1
+            return default
+
+        self._hits += 1
+        self._items.move_to_end(key)
+
+        return entry[0]
+
+    def getMaxSize(self):
+        return self._maxSize
+
+    def getSize(self):
+        return self._size
+
+    def getStats(self):
+        """
+        Get a dict with the cache's counters and current size.
+        """
+
+        lookups = self._hits + self._misses
+        hitRate = 0.0
+        if (lookups > 0):
+            hitRate = self._hits / lookups
+
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'hitRate': hitRate,
+            'evictions': self._evictions,
+            'items': len(self._items),
+            'size': self._size,
+            'maxSize': self._maxSize,
+        }
+
+    def put(self, key, value):
+        """
+        Add (or replace) an item, evicting old items until the cache fits.
+        Items that are larger than the whole cache are not stored.
+        """
+
+        size = 1
+        if (self._sizeFunction is not None):
+            size = self._sizeFunction(key, value)
+
+        if (key in self._items):
+            self._size -= self._items.pop(key)[1]
+
+        if (size > self._maxSize):
+            return
+
+        self._items[key] = (value, size)
+        self._size += size
+
+        while (self._size > self._maxSize):
+            _, (_, evictedSize) = self._items.popitem(last = False)
+            self._size -= evictedSize
+            self._evictions += 1
+
+    def remove(self, key):
+        """
+        Remove an item if it is in the cache.
+        Returns the removed value, or None.
+        """
+
+        entry = self._items.pop(key, None)
+        if (entry is None):
+            return None
+
+        self._size -= entry[1]
+        return entry[0]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
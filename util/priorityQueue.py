@@ -32,6 +32,168 @@ class PriorityQueue(object):
     def __len__(self):
         return len(self.heap)
 
+class IndexedPriorityQueue(object):
+    """
+    A priority queue (binary heap) that holds every item at most once,
+    and knows where each item is in the heap so its priority can be changed.
+
+    It has the same push/pop/isEmpty signature as `PriorityQueue`,
+    but pushing an item that is already in the queue lowers its priority
+    (if the new priority is lower) instead of adding a duplicate.
+    Items must be hashable.
+    Items with the same priority come out in an arbitrary order,
+    so use tuple priorities to break ties.
+    """
+
+    def __init__(self):
+        # [[priority, item], ...]
+        self.heap = []
+        # {item: index in heap, ...}
+        self._indexes = {}
+
+    def contains(self, item):
+        return item in self._indexes
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of an item that is in the queue.
+        Raises a KeyError if the item is not in the queue,
+        and a ValueError if the priority is higher than its current one.
+        """
+
+        index = self._indexes[item]
+        entry = self.heap[index]
+
+        if (priority > entry[0]):
+            raise ValueError('Can not increase the priority of an item (from %s to %s).' %
+                    (entry[0], priority))
+
+        entry[0] = priority
+        self._siftUp(index)
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def items(self):
+        """
+        Get every item in the queue with its priority: [(item, priority), ...],
+        in no particular order.
+        """
+
+        return [(item, priority) for (priority, item) in self.heap]
+
+    def peekWithPriority(self):
+        """
+        Get the item with the lowest priority, and that priority, without removing it.
+        """
+
+        entry = self.heap[0]
+        return entry[1], entry[0]
+
+    def pop(self):
+        """
+        Remove and return the item with the lowest priority.
+        """
+
+        return self.popWithPriority()[0]
+
+    def popWithPriority(self):
+        """
+        Remove and return the item with the lowest priority, and that priority.
+        """
+
+        heap = self.heap
+        entry = heap[0]
+
+        last = heap.pop()
+        if (len(heap) > 0):
+            heap[0] = last
+            self._indexes[last[1]] = 0
+            self._siftDown(0)
+
+        del self._indexes[entry[1]]
+
+        return entry[1], entry[0]
+
+    def priorityOf(self, item):
+        """
+        Get the current priority of an item.
+        Raises a KeyError if the item is not in the queue.
+        """
+
+        return self.heap[self._indexes[item]][0]
+
+    def push(self, item, priority):
+        """
+        Add an item to the queue.
+        If the item is already in the queue, then it keeps the lower of the two priorities.
+        Returns True if the queue changed.
+        """
+
+        index = self._indexes.get(item)
+        if (index is not None):
+            if (priority >= self.heap[index][0]):
+                return False
+
+            self.heap[index][0] = priority
+            self._siftUp(index)
+            return True
+
+        self.heap.append([priority, item])
+        self._indexes[item] = len(self.heap) - 1
+        self._siftUp(len(self.heap) - 1)
+
+        return True
+
+    def _siftDown(self, index):
+        heap = self.heap
+        indexes = self._indexes
+
+        size = len(heap)
+        entry = heap[index]
+
+        while (True):
+            child = 2 * index + 1
+            if (child >= size):
+                break
+
+            if (child + 1 < size and heap[child + 1][0] < heap[child][0]):
+                child += 1
+
+            if (not heap[child][0] < entry[0]):
+                break
+
+            heap[index] = heap[child]
+            indexes[heap[index][1]] = index
+            index = child
+
+        heap[index] = entry
+        indexes[entry[1]] = index
+
+    def _siftUp(self, index):
+        heap = self.heap
+        indexes = self._indexes
+
+        entry = heap[index]
+
+        while (index > 0):
+            parent = (index - 1) // 2
+            if (not entry[0] < heap[parent][0]):
+                break
+
+            heap[index] = heap[parent]
+            indexes[heap[index][1]] = index
+            index = parent
+
+        heap[index] = entry
+        indexes[entry[1]] = index
+
+    def __contains__(self, item):
+        return item in self._indexes
+
+    def __len__(self):
+        return len(self.heap)
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the Queue and the Stack classes.